@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_SRC_DIR = os.path.join(ROOT_DIR, 'src', 'data')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Configuration
+MODULES = ['scrape', 'deepplayerdata', 'fetch_scheduler']
+REPEATS = 7
+TOP_IMPORTS = 5  # heaviest direct imports listed per module
+
+def git_commit(ref: str = 'HEAD') -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', ref], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def extract_ref(ref: str, target_dir: str) -> str:
+    """Check out src/data at ref into target_dir and return the path of the copy."""
+    archive_path = os.path.join(target_dir, 'src.tar')
+    with open(archive_path, 'wb') as f:
+        subprocess.run(['git', 'archive', ref, 'src/data'], cwd=ROOT_DIR, stdout=f, check=True)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(target_dir)
+    return os.path.join(target_dir, 'src', 'data')
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `python -X importtime` output as dicts of self_us, cumulative_us, depth and name."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append({'self_us': int(self_us), 'cumulative_us': int(cumulative_us), 'depth': depth,
+                     'name': name.strip()})
+    return rows
+
+def measure_module(module: str, src_dir: str, repeats: int) -> Optional[Dict[str, Any]]:
+    """Import time reported by -X importtime and wall time of a fresh interpreter importing module."""
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    # Warm-up run, so bytecode compilation is not counted
+    warmup = subprocess.run(command, cwd=src_dir, capture_output=True, text=True)
+    if warmup.returncode != 0:
+        return None
+
+    import_us, wall_s, rows = [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=src_dir, capture_output=True, text=True, check=True)
+        wall_s.append(time.perf_counter() - start)
+        rows = parse_importtime(result.stderr)
+        import_us.append(next(row['cumulative_us'] for row in reversed(rows) if row['name'] == module))
+
+    # Direct imports of the module are the depth-1 rows right before it in the output
+    module_index = max(i for i, row in enumerate(rows) if row['name'] == module)
+    children = []
+    for row in reversed(rows[:module_index]):
+        if row['depth'] == 0:
+            break
+        if row['depth'] == 1:
+            children.append(row)
+    children.sort(key=lambda row: row['cumulative_us'], reverse=True)
+
+    return {
+        'import_ms': statistics.median(import_us) / 1000,
+        'process_ms': statistics.median(wall_s) * 1000,
+        'heaviest_imports': {row['name']: row['cumulative_us'] / 1000 for row in children[:TOP_IMPORTS]},
+    }
+
+def measure_tree(src_dir: str, modules: List[str], repeats: int) -> Dict[str, Any]:
+    results = {}
+    for module in modules:
+        result = measure_module(module, src_dir, repeats)
+        results[module] = result
+        if result is None:
+            print(f"{module:20s} import failed")
+            continue
+        heaviest = ', '.join(f'{name} {ms:.1f}' for name, ms in result['heaviest_imports'].items())
+        print(f"{module:20s} import {result['import_ms']:8.1f} ms  process {result['process_ms']:8.1f} ms  "
+              f"({heaviest})")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import cost of the scraper modules.")
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--compare-ref', help="Git ref to measure as well, e.g. HEAD~1, for a before/after table")
+    parser.add_argument('--output', help="Where to write the JSON results (default: results/import_time-<commit>.json)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    print(f"Working tree ({commit}):")
+    current = measure_tree(DATA_SRC_DIR, args.modules, args.repeats)
+    output = {
+        'meta': {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                 'python': sys.version.split()[0], 'repeats': args.repeats},
+        'results': current,
+    }
+
+    if args.compare_ref:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            print(f"\n{args.compare_ref} ({git_commit(args.compare_ref)}):")
+            baseline = measure_tree(extract_ref(args.compare_ref, tmp_dir), args.modules, args.repeats)
+        output['baseline'] = {'ref': args.compare_ref, 'commit': git_commit(args.compare_ref), 'results': baseline}
+
+        print(f"\n{'module':20s} {'before':>10s} {'after':>10s} {'speedup':>8s}")
+        for module in args.modules:
+            before, after = baseline.get(module), current.get(module)
+            if before and after:
+                print(f"{module:20s} {before['import_ms']:8.1f}ms {after['import_ms']:8.1f}ms "
+                      f"{before['import_ms'] / after['import_ms']:7.1f}x")
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f'import_time-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src', 'data'))
+
+from cleaning import clean_player_data, split_teams  # noqa: E402
+
+# Configuration
+RAW_DATA_PATH = os.path.join(ROOT_DIR, 'data', 'raw', 'deep_player_data.csv')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+SNAPSHOT_COUNTS = [1, 10, 50]  # copies of the real snapshot stored as separate weekly partitions
+SEASON = '2024'
+MEMORY_LIMIT = '256MB'
+PARTITIONS_PER_QUERY = 8
+CHUNK_ROWS = 5000
+TOLERANCE = 1e-9
+RSS_SAMPLE_INTERVAL = 0.005  # seconds between RSS samples while a path runs
+
+def snapshot_label(i: int) -> str:
+    return f'week-{i:03d}'
+
+def build_dataset(data_dir: str, n_snapshots: int) -> None:
+    """n_snapshots copies of the raw CSV, both as loose files (pandas path) and as a Parquet store (DuckDB path)."""
+    from player_store import connect, ingest_snapshot
+
+    csv_dir = os.path.join(data_dir, 'csv')
+    os.makedirs(csv_dir, exist_ok=True)
+    con = connect(temp_dir=os.path.join(data_dir, 'tmp'))
+    for i in range(n_snapshots):
+        csv_path = os.path.join(csv_dir, f'{snapshot_label(i)}.csv')
+        shutil.copyfile(RAW_DATA_PATH, csv_path)
+        ingest_snapshot(con, csv_path, SEASON, snapshot_label(i), os.path.join(data_dir, 'store'))
+    con.close()
+
+def current_rss_mb() -> float:
+    """Resident set size right now, from /proc (Linux only)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def sample_peak_rss(stop: threading.Event, samples: List[float]) -> None:
+    """Append the current RSS every RSS_SAMPLE_INTERVAL until stop is set.
+
+    ru_maxrss is not used: it is a high-water mark for the whole process, so a peak
+    reached while importing sklearn/pandas/duckdb hides anything smaller that the
+    run itself allocates.
+    """
+    while not stop.is_set():
+        samples.append(current_rss_mb())
+        stop.wait(RSS_SAMPLE_INTERVAL)
+
+def tally(summary: Dict[str, Any], team_frames, solo_frames) -> Dict[str, Any]:
+    """Counts and a rating checksum, so both paths can be checked for the same result."""
+    for team_df in team_frames:
+        summary['teams'] += 1
+        summary['team_rows'] += len(team_df)
+    for solo_df in solo_frames:
+        summary['solo_rows'] += len(solo_df)
+        summary['solo_rating_sum'] += float(solo_df['rating'].sum())
+    return summary
+
+def empty_summary() -> Dict[str, Any]:
+    return {'teams': 0, 'team_rows': 0, 'solo_rows': 0, 'solo_rating_sum': 0.0}
+
+def pandas_path(data_dir: str) -> Dict[str, Any]:
+    """The notebook approach: load every snapshot eagerly, then clean and split each one."""
+    csv_dir = os.path.join(data_dir, 'csv')
+    labels = sorted(name[:-len('.csv')] for name in os.listdir(csv_dir))
+    raw = pd.concat([pd.read_csv(os.path.join(csv_dir, f'{label}.csv')) for label in labels],
+                    keys=labels, names=['snapshot', None])
+
+    results = {}
+    for label, group in raw.groupby(level='snapshot'):
+        results[label] = split_teams(clean_player_data(group.reset_index(drop=True)))
+
+    summary = empty_summary()
+    for team_dfs, solo_players_df in results.values():
+        tally(summary, team_dfs.values(), [solo_players_df])
+    return summary
+
+def duckdb_path(data_dir: str, memory_limit: str, chunk_rows: int, partitions_per_query: int) -> Dict[str, Any]:
+    """Stream teams and free agents out of the Parquet store, one team or chunk at a time."""
+    from player_store import connect, iter_solo_players, iter_team_frames
+
+    store_dir = os.path.join(data_dir, 'store')
+    con = connect(memory_limit, temp_dir=os.path.join(data_dir, 'tmp'))
+    options = dict(chunk_rows=chunk_rows, partitions_per_query=partitions_per_query)
+    summary = tally(empty_summary(),
+                    (team_df for _, team_df in iter_team_frames(con, store_dir, **options)),
+                    iter_solo_players(con, store_dir, **options))
+    con.close()
+    return summary
+
+def run_worker(path: str, data_dir: str, memory_limit: str, chunk_rows: int,
+               partitions_per_query: int) -> Dict[str, Any]:
+    """Run one path in a fresh interpreter so its memory use is not mixed up with the other's."""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', path, '--data-dir', data_dir,
+               '--memory-limit', memory_limit, '--chunk-rows', str(chunk_rows),
+               '--partitions-per-query', str(partitions_per_query)]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def worker(path: str, data_dir: str, memory_limit: str, chunk_rows: int, partitions_per_query: int) -> None:
+    if path == 'duckdb':
+        import player_store  # noqa: F401  (so the import is in the baseline like pandas is)
+    baseline_rss = current_rss_mb()
+    samples = [baseline_rss]
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_peak_rss, args=(stop, samples), daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    if path == 'pandas':
+        summary = pandas_path(data_dir)
+    else:
+        summary = duckdb_path(data_dir, memory_limit, chunk_rows, partitions_per_query)
+    wall_s = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    samples.append(current_rss_mb())
+    print(json.dumps({'wall_s': wall_s, 'peak_rss_mb': max(samples), 'baseline_rss_mb': baseline_rss,
+                      'rss_samples': len(samples), 'summary': summary}))
+
+def check_equivalence(data_dir: str) -> List[str]:
+    """Columns where the DuckDB-cleaned first snapshot differs from clean_player_data."""
+    from player_store import connect, iter_query
+
+    con = connect(temp_dir=os.path.join(data_dir, 'tmp'))
+    duck = pd.concat(iter_query(con, 'cleaned', os.path.join(data_dir, 'store'), snapshots=[snapshot_label(0)]))
+    duck = duck.drop(columns=['season', 'snapshot'])
+    con.close()
+    expected = clean_player_data(pd.read_csv(RAW_DATA_PATH))
+
+    sort_columns = ['player_name', 'real_name', 'team', 'rating', 'kd_ratio']
+    duck = duck.reset_index().sort_values(sort_columns).reset_index(drop=True)
+    expected = expected.reset_index().sort_values(sort_columns).reset_index(drop=True)
+    if list(duck.columns) != list(expected.columns) or len(duck) != len(expected):
+        return ['<shape>']
+
+    mismatched = []
+    for column in expected.columns:
+        if expected[column].dtype.kind in 'fi':
+            same = np.allclose(duck[column].astype(float), expected[column].astype(float),
+                               equal_nan=True, atol=TOLERANCE)
+        else:
+            same = (duck[column].fillna('').astype(str) == expected[column].fillna('').astype(str)).all()
+        if not same:
+            mismatched.append(column)
+    return mismatched
+
+def same_summary(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return (a['teams'] == b['teams'] and a['team_rows'] == b['team_rows'] and a['solo_rows'] == b['solo_rows']
+            and abs(a['solo_rating_sum'] - b['solo_rating_sum']) < 1e-6 * max(1.0, abs(b['solo_rating_sum'])))
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Peak memory and wall time of the pandas cleaning path against the DuckDB Parquet store.")
+    parser.add_argument('--snapshots', nargs='+', type=int, default=SNAPSHOT_COUNTS,
+                        help="Numbers of stored snapshots to benchmark")
+    parser.add_argument('--memory-limit', default=MEMORY_LIMIT)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--partitions-per-query', type=int, default=PARTITIONS_PER_QUERY)
+    parser.add_argument('--output', help="Where to write the JSON results (default: results/out_of_core-<commit>.json)")
+    parser.add_argument('--worker', choices=['pandas', 'duckdb'], help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.data_dir, args.memory_limit, args.chunk_rows, args.partitions_per_query)
+        return
+
+    results = {}
+    for n_snapshots in args.snapshots:
+        with tempfile.TemporaryDirectory() as data_dir:
+            build_dataset(data_dir, n_snapshots)
+            if n_snapshots == args.snapshots[0]:
+                mismatched = check_equivalence(data_dir)
+                print(f"DuckDB cleaning matches clean_player_data: {not mismatched}"
+                      + (f" (differs in {', '.join(mismatched)})" if mismatched else ''))
+            options = (args.memory_limit, args.chunk_rows, args.partitions_per_query)
+            pandas_result = run_worker('pandas', data_dir, *options)
+            duckdb_result = run_worker('duckdb', data_dir, *options)
+
+        rows = pandas_result['summary']['team_rows'] + pandas_result['summary']['solo_rows']
+        results[str(n_snapshots)] = {'pandas': pandas_result, 'duckdb': duckdb_result,
+                                     'same_result': same_summary(pandas_result['summary'], duckdb_result['summary'])}
+        for path, result in (('pandas', pandas_result), ('duckdb', duckdb_result)):
+            print(f"{n_snapshots:4d} snapshots ({rows:7d} rows) {path:7s} {result['wall_s']:8.2f} s  "
+                  f"peak {result['peak_rss_mb']:8.1f} MB (+{result['peak_rss_mb'] - result['baseline_rss_mb']:.1f} MB)")
+        if not results[str(n_snapshots)]['same_result']:
+            print(f"  WARNING: results differ: {pandas_result['summary']} vs {duckdb_result['summary']}")
+
+    output = {
+        'meta': {'commit': git_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                 'memory_limit': args.memory_limit, 'chunk_rows': args.chunk_rows,
+                 'partitions_per_query': args.partitions_per_query, 'pandas': pd.__version__},
+        'results': results,
+    }
+    output_path = args.output or os.path.join(RESULTS_DIR, f"out_of_core-{output['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+if __name__ == '__main__':
+    main()
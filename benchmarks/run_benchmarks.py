@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from xgboost import XGBRegressor
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src', 'data'))
+
+from cleaning import clean_player_data, convert_numeric_columns, split_teams  # noqa: E402
+from deepplayerdata import extract_player_data, flatten_player_data  # noqa: E402
+from replay_server import synthetic_profile  # noqa: E402
+
+# Configuration
+RAW_DATA_PATH = os.path.join(ROOT_DIR, 'data', 'raw', 'deep_player_data.csv')
+X_TRAIN_PATH = os.path.join(ROOT_DIR, 'outputs', 'X_train_encoded.joblib')
+Y_TRAIN_PATH = os.path.join(ROOT_DIR, 'outputs', 'y_train.joblib')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Dataset scale factors: small is the real data as scraped, large is 100x
+SIZES = {'small': 1, 'medium': 10, 'large': 100}
+REPEATS = {'small': 5, 'medium': 3, 'large': 1}
+PROFILE_PAGES_PER_SCALE = 20
+SINGLE_PREDICT_CALLS = 50
+DEFAULT_THRESHOLD = 0.25  # allowed relative slowdown of the median before --compare fails
+SEED = 42
+
+# The estimators from ModelTime.ipynb
+MODELS = {
+    'Linear Regression': lambda: LinearRegression(),
+    'Random Forest': lambda: RandomForestRegressor(random_state=42, n_estimators=100),
+    'XGBoost': lambda: XGBRegressor(random_state=42, n_estimators=100),
+}
+
+def scale_frame(df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """Stack scale copies of df with a fresh index. Team names are kept, so team counts do not grow."""
+    if scale == 1:
+        return df.copy()
+    return pd.concat([df] * scale, ignore_index=True)
+
+def scale_features(X: pd.DataFrame, y: pd.Series, scale: int):
+    """Stack scale copies of the encoded training data with small seeded noise so trees do not see exact duplicates."""
+    if scale == 1:
+        return X.copy(), y.copy()
+    rng = np.random.default_rng(SEED)
+    X_scaled = pd.concat([X] * scale, ignore_index=True)
+    X_scaled += rng.normal(0, 0.01, size=X_scaled.shape)
+    y_scaled = pd.concat([y] * scale, ignore_index=True)
+    return X_scaled, y_scaled
+
+def time_call(fn: Callable[[], Any], repeats: int, setup: Callable[[], Any] = None) -> List[float]:
+    """Wall time of fn over repeats runs. setup (untimed) runs before each one and its result is passed to fn."""
+    times = []
+    for _ in range(repeats):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def summarize(times: List[float], n_items: int) -> Dict[str, Any]:
+    median = statistics.median(times)
+    return {
+        'min_s': min(times),
+        'median_s': median,
+        'mean_s': statistics.mean(times),
+        'repeats': len(times),
+        'n_items': n_items,
+        'per_item_ms': median / n_items * 1000 if n_items else None,
+    }
+
+def bench_parse(scale: int, repeats: int) -> Dict[str, Any]:
+    pages = [synthetic_profile(player_id) for player_id in range(PROFILE_PAGES_PER_SCALE * scale)]
+
+    def parse_all():
+        for html in pages:
+            flatten_player_data(extract_player_data(html))
+
+    return summarize(time_call(parse_all, repeats), len(pages))
+
+def bench_clean(raw_df: pd.DataFrame, scale: int, repeats: int) -> Dict[str, Any]:
+    raw = scale_frame(raw_df, scale)
+    # convert_numeric_columns modifies its input, so each run gets a fresh copy outside the timing
+    return summarize(time_call(convert_numeric_columns, repeats, setup=raw.copy), len(raw))
+
+def bench_team_grouping(cleaned_df: pd.DataFrame, scale: int, repeats: int) -> Dict[str, Any]:
+    df = scale_frame(cleaned_df.reset_index(), scale).set_index('player_name')
+    return summarize(time_call(lambda: split_teams(df), repeats), len(df))
+
+def bench_models(X: pd.DataFrame, y: pd.Series, scale: int, repeats: int) -> Dict[str, Dict[str, Any]]:
+    X_scaled, y_scaled = scale_features(X, y, scale)
+    single_row = X_scaled.iloc[[0]]
+    results = {}
+    for name, make_model in MODELS.items():
+        results[f'fit/{name}'] = summarize(
+            time_call(lambda model: model.fit(X_scaled, y_scaled), repeats, setup=make_model), len(X_scaled))
+
+        model = make_model().fit(X_scaled, y_scaled)
+
+        def predict_single():
+            for _ in range(SINGLE_PREDICT_CALLS):
+                model.predict(single_row)
+
+        results[f'predict_single/{name}'] = summarize(time_call(predict_single, repeats), SINGLE_PREDICT_CALLS)
+        results[f'predict_batch/{name}'] = summarize(time_call(lambda: model.predict(X_scaled), repeats),
+                                                     len(X_scaled))
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run(sizes: List[str], benchmarks: List[str]) -> Dict[str, Any]:
+    raw_df = pd.read_csv(RAW_DATA_PATH)
+    cleaned_df = clean_player_data(raw_df)
+    X = joblib.load(X_TRAIN_PATH)
+    y = joblib.load(Y_TRAIN_PATH)
+
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        scale, repeats = SIZES[size], REPEATS[size]
+        size_results: Dict[str, Any] = {}
+        if 'parse' in benchmarks:
+            size_results['parse'] = bench_parse(scale, repeats)
+        if 'clean' in benchmarks:
+            size_results['clean'] = bench_clean(raw_df, scale, repeats)
+        if 'team_grouping' in benchmarks:
+            size_results['team_grouping'] = bench_team_grouping(cleaned_df, scale, repeats)
+        if 'models' in benchmarks:
+            size_results.update(bench_models(X, y, scale, repeats))
+
+        for name, result in size_results.items():
+            key = f'{name}[{size}]'
+            results[key] = result
+            print(f"{key:45s} median {result['median_s'] * 1000:10.2f} ms  "
+                  f"({result['per_item_ms']:.4f} ms/item over {result['n_items']})")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        },
+        'results': results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of benchmarks whose median got slower than baseline by more than threshold (a fraction)."""
+    regressions = []
+    print(f"\nComparison against {baseline['meta'].get('commit', 'baseline')} (threshold {threshold:.0%}):")
+    for key, result in current['results'].items():
+        old = baseline['results'].get(key)
+        if not old:
+            continue
+        change = result['median_s'] / old['median_s'] - 1
+        flag = 'REGRESSION' if change > threshold else ''
+        print(f"{key:45s} {old['median_s'] * 1000:10.2f} ms -> {result['median_s'] * 1000:10.2f} ms  "
+              f"{change:+7.1%} {flag}")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the scrape, clean, train and predict hot paths.")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--benchmarks', nargs='+', choices=['parse', 'clean', 'team_grouping', 'models'],
+                        default=['parse', 'clean', 'team_grouping', 'models'])
+    parser.add_argument('--output', help="Where to write the JSON results (default: results/<commit>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown, e.g. 0.25 for 25%%")
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.benchmarks)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{current['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+import argparse
+import itertools
+import os
+import pickle
+import time
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from similar_players import DATA_DIR, ROLE_SCORE_COLUMNS, SOLO_TEAM_NAME
+
+# Configuration
+MODELS_DIR = os.path.join(DATA_DIR, '..', 'models')
+SOLO_PLAYERS_PKL_PATH = os.path.join(DATA_DIR, 'processed', 'solo_players_df.pkl')
+TEAM_DFS_PKL_PATH = os.path.join(DATA_DIR, 'processed', 'team_dfs.pkl')
+FEATURE_NAMES_PKL_PATH = os.path.join(DATA_DIR, 'features', 'feature_names.pkl')
+MODEL_PATH = os.path.join(MODELS_DIR, 'xgboost_model.joblib')
+TARGET_ENCODER_PATH = os.path.join(MODELS_DIR, 'team_target_encoder.joblib')
+SCALER_PATH = os.path.join(MODELS_DIR, 'standard_scaler.joblib')
+
+ROSTER_SIZE = 5
+DEFAULT_ROLE_WEIGHT = 0.25
+DEFAULT_AWP_THRESHOLD = 0.5  # MinMax-scaled sniping_score above which a player counts as an AWPer
+DEFAULT_TIME_BUDGET = 5.0  # seconds
+DEADLINE_CHECK_INTERVAL = 256  # search nodes between clock checks
+
+
+def predict_player_ratings(players_df: pd.DataFrame, team_name: Optional[str] = None) -> pd.Series:
+    """
+    Score every player in one batched predict call with the model saved by ModelTime.ipynb.
+
+    If team_name is given, every player is encoded as a member of that team, so
+    free agents are rated as they would be after joining it.
+    """
+    with open(FEATURE_NAMES_PKL_PATH, 'rb') as f:
+        feature_names = pickle.load(f)
+    target_encoder = joblib.load(TARGET_ENCODER_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    model = joblib.load(MODEL_PATH)
+
+    X = players_df[feature_names].copy()
+    if team_name is not None:
+        X['team'] = team_name
+    X_encoded = target_encoder.transform(X)
+    numeric_features = [col for col in feature_names if col != 'team']
+    X_encoded[numeric_features] = scaler.transform(X_encoded[numeric_features])
+
+    return pd.Series(model.predict(X_encoded[feature_names]), index=players_df.index, name='predicted_rating')
+
+
+def team_strength(ratings: np.ndarray, role_scores: np.ndarray, role_weight: float = DEFAULT_ROLE_WEIGHT) -> float:
+    """
+    Mean player rating plus a bonus for role coverage, i.e. the mean over roles
+    of the best role score anyone in the lineup has.
+    """
+    return float(ratings.mean() + role_weight * role_scores.max(axis=0).mean())
+
+
+def optimize_roster(pool_df: pd.DataFrame, ratings: pd.Series, core_df: Optional[pd.DataFrame] = None,
+                    role_weight: float = DEFAULT_ROLE_WEIGHT, min_awpers: int = 1, max_awpers: int = 1,
+                    awp_threshold: float = DEFAULT_AWP_THRESHOLD,
+                    time_budget: float = DEFAULT_TIME_BUDGET) -> Dict[str, Any]:
+    """
+    Fill the open slots next to core_df with players from pool_df so team_strength is maximised.
+
+    This is a depth-first branch and bound over candidates sorted by rating. A
+    partial lineup is pruned once its optimistic bound (the best remaining
+    ratings plus the best remaining role coverage) cannot beat the incumbent,
+    and the last open slot is scored for all remaining candidates in one
+    vectorized step. When time_budget runs out the best lineup found so far
+    is returned with 'complete' set to False.
+    """
+    deadline = time.perf_counter() + time_budget
+    if core_df is None:
+        core_df = pool_df.iloc[0:0]
+    slots = ROSTER_SIZE - len(core_df)
+    if slots < 0:
+        raise ValueError(f"A roster has {ROSTER_SIZE} players, got a core of {len(core_df)}")
+
+    pool_df = pool_df.drop(index=core_df.index, errors='ignore')
+    pool_ratings = ratings.reindex(pool_df.index).to_numpy(dtype=float)
+    valid = ~np.isnan(pool_ratings)
+    order = np.argsort(-pool_ratings[valid], kind='stable')
+    names = pool_df.index[valid][order]
+    cand_ratings = pool_ratings[valid][order]
+    cand_roles = pool_df[ROLE_SCORE_COLUMNS].fillna(0.0).to_numpy(dtype=float)[valid][order]
+    cand_awp = cand_roles[:, ROLE_SCORE_COLUMNS.index('sniping_score')] >= awp_threshold
+    n = len(names)
+
+    core_ratings = ratings.reindex(core_df.index).to_numpy(dtype=float)
+    if np.isnan(core_ratings).any():
+        raise ValueError("Every core player needs a rating")
+    core_roles = core_df[ROLE_SCORE_COLUMNS].fillna(0.0).to_numpy(dtype=float)
+    core_awpers = int((core_roles[:, ROLE_SCORE_COLUMNS.index('sniping_score')] >= awp_threshold).sum())
+    base_role_max = core_roles.max(axis=0) if len(core_roles) else np.zeros(len(ROLE_SCORE_COLUMNS))
+
+    # Suffix tables for the bounds: best role scores and AWPer count from position i onwards,
+    # and prefix sums of the (descending) ratings so the best r ratings from i are a subtraction
+    suffix_role_max = np.zeros((n + 1, len(ROLE_SCORE_COLUMNS)))
+    suffix_awpers = np.zeros(n + 1, dtype=int)
+    for i in range(n - 1, -1, -1):
+        suffix_role_max[i] = np.maximum(suffix_role_max[i + 1], cand_roles[i])
+        suffix_awpers[i] = suffix_awpers[i + 1] + cand_awp[i]
+    rating_prefix = np.concatenate([[0.0], np.cumsum(cand_ratings)])
+
+    best = {'value': -np.inf, 'picks': None}
+    stats = {'nodes': 0, 'timed_out': False}
+
+    def objective(rating_sum, role_max):
+        return rating_sum / ROSTER_SIZE + role_weight * role_max.mean()
+
+    def search(start, picks, rating_sum, role_max, awpers):
+        stats['nodes'] += 1
+        if stats['nodes'] % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+            stats['timed_out'] = True
+        if stats['timed_out']:
+            return
+
+        remaining = slots - len(picks)
+        if remaining == 0:
+            if min_awpers <= awpers <= max_awpers:
+                value = objective(rating_sum, role_max)
+                if value > best['value']:
+                    best['value'], best['picks'] = value, list(picks)
+            return
+
+        if remaining == 1:
+            # Batched leaf: score every remaining candidate for the last slot at once
+            tail = slice(start, n)
+            final_awpers = awpers + cand_awp[tail]
+            allowed = (final_awpers >= min_awpers) & (final_awpers <= max_awpers)
+            if not allowed.any():
+                return
+            values = ((rating_sum + cand_ratings[tail]) / ROSTER_SIZE
+                      + role_weight * np.maximum(role_max, cand_roles[tail]).mean(axis=1))
+            values[~allowed] = -np.inf
+            pick = int(np.argmax(values))
+            if values[pick] > best['value']:
+                best['value'], best['picks'] = float(values[pick]), picks + [start + pick]
+            return
+
+        for i in range(start, n - remaining + 1):
+            # Awpers still needed must fit in the open slots and exist further down the list
+            needed = min_awpers - awpers
+            if needed > remaining or needed > suffix_awpers[i]:
+                return
+            bound = objective(rating_sum + rating_prefix[i + remaining] - rating_prefix[i],
+                              np.maximum(role_max, suffix_role_max[i]))
+            if bound <= best['value']:
+                # Candidates are sorted by rating, so every later branch has a lower bound
+                return
+
+            next_awpers = awpers + int(cand_awp[i])
+            if next_awpers > max_awpers:
+                continue
+            search(i + 1, picks + [i], rating_sum + cand_ratings[i],
+                   np.maximum(role_max, cand_roles[i]), next_awpers)
+            if stats['timed_out']:
+                return
+
+    if slots == 0:
+        if min_awpers <= core_awpers <= max_awpers:
+            best['value'], best['picks'] = objective(core_ratings.sum(), base_role_max), []
+    else:
+        search(0, [], core_ratings.sum(), base_role_max, core_awpers)
+
+    if best['picks'] is None:
+        return {'players': [], 'added': [], 'strength': None,
+                'complete': not stats['timed_out'], 'nodes': stats['nodes']}
+
+    added = [names[i] for i in best['picks']]
+    return {
+        'players': list(core_df.index) + added,
+        'added': added,
+        'strength': best['value'],
+        'complete': not stats['timed_out'],
+        'nodes': stats['nodes'],
+    }
+
+
+def best_replacement(team_df: pd.DataFrame, pool_df: pd.DataFrame, ratings: pd.Series, n_replace: int = 1,
+                     time_budget: float = DEFAULT_TIME_BUDGET, **kwargs) -> Dict[str, Any]:
+    """
+    Try dropping every combination of n_replace current players and refilling from the pool.
+    A team with more than ROSTER_SIZE players also benches its surplus, so every
+    choice of which ROSTER_SIZE - n_replace players to keep is tried. The time
+    budget is shared across all combinations.
+    """
+    if not 0 <= n_replace <= min(len(team_df), ROSTER_SIZE):
+        raise ValueError(f"Can replace 0 to {min(len(team_df), ROSTER_SIZE)} players, got {n_replace}")
+    n_removed = max(len(team_df) - ROSTER_SIZE, 0) + n_replace
+
+    deadline = time.perf_counter() + time_budget
+    best_result: Dict[str, Any] = {'players': [], 'added': [], 'removed': [], 'strength': None,
+                                   'complete': True, 'nodes': 0}
+    nodes = 0
+    complete = True
+    for removed in itertools.combinations(team_df.index, n_removed):
+        remaining_time = deadline - time.perf_counter()
+        if remaining_time <= 0:
+            complete = False
+            break
+        core_df = team_df.drop(index=list(removed))
+        result = optimize_roster(pool_df, ratings, core_df=core_df, time_budget=remaining_time, **kwargs)
+        nodes += result['nodes']
+        complete &= result['complete']
+        if result['strength'] is not None and (best_result['strength'] is None
+                                               or result['strength'] > best_result['strength']):
+            best_result = dict(result, removed=list(removed))
+
+    best_result['nodes'] = nodes
+    best_result['complete'] = complete
+    return best_result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the free-agent pool for the strongest five-player lineup.")
+    parser.add_argument('--team', help="Team (lowercase, as in team_dfs) to find replacements for; omit to build a full lineup from free agents")
+    parser.add_argument('--replace', type=int, default=1,
+                        help="How many of the team's players to replace (teams over five also bench the rest)")
+    parser.add_argument('--score-column', help="Use an existing column (e.g. rating) instead of the saved model's predictions")
+    parser.add_argument('--role-weight', type=float, default=DEFAULT_ROLE_WEIGHT)
+    parser.add_argument('--min-awpers', type=int, default=1)
+    parser.add_argument('--max-awpers', type=int, default=1)
+    parser.add_argument('--awp-threshold', type=float, default=DEFAULT_AWP_THRESHOLD)
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET, help="Search time limit in seconds")
+    args = parser.parse_args()
+
+    # Nicknames are not unique (a free agent and a team player can share one), so players
+    # are keyed by real_name and shown as "nickname (real name)"
+    solo_players_df = pd.read_pickle(SOLO_PLAYERS_PKL_PATH).reset_index().set_index('real_name')
+    team_df = None
+    if args.team:
+        with open(TEAM_DFS_PKL_PATH, 'rb') as f:
+            team_dfs = pickle.load(f)
+        if args.team not in team_dfs:
+            parser.error(f"Unknown team: {args.team}")
+        team_df = team_dfs[args.team].reset_index().set_index('real_name')
+        if not 0 <= args.replace <= min(len(team_df), ROSTER_SIZE):
+            parser.error(f"--replace must be between 0 and {min(len(team_df), ROSTER_SIZE)} "
+                         f"for {args.team} ({len(team_df)} players)")
+
+    players_df = pd.concat([solo_players_df, team_df]) if team_df is not None else solo_players_df
+    if not players_df.index.is_unique:
+        parser.error("Player real names must be unique")
+    if args.score_column:
+        ratings = players_df[args.score_column]
+    else:
+        ratings = predict_player_ratings(players_df, team_name=args.team or SOLO_TEAM_NAME)
+
+    def labels(keys):
+        return ', '.join(f"{players_df.at[key, 'player_name']} ({key})" for key in keys)
+
+    options = dict(role_weight=args.role_weight, min_awpers=args.min_awpers, max_awpers=args.max_awpers,
+                   awp_threshold=args.awp_threshold, time_budget=args.time_budget)
+    start = time.perf_counter()
+    if team_df is not None:
+        current = team_strength(ratings.reindex(team_df.index).to_numpy(dtype=float),
+                                team_df[ROLE_SCORE_COLUMNS].fillna(0.0).to_numpy(dtype=float), args.role_weight)
+        print(f"Current {args.team} lineup: {labels(team_df.index)} (strength {current:.4f})")
+        result = best_replacement(team_df, solo_players_df, ratings, n_replace=args.replace, **options)
+        if result['removed']:
+            print(f"Replace: {labels(result['removed'])}")
+    else:
+        result = optimize_roster(solo_players_df, ratings, **options)
+    elapsed = time.perf_counter() - start
+
+    if result['strength'] is None:
+        print("No lineup satisfies the role constraints.")
+    else:
+        print(f"Best lineup: {labels(result['players'])} (strength {result['strength']:.4f})")
+        print(f"Added: {labels(result['added'])}")
+    status = "complete" if result['complete'] else "stopped at time budget"
+    print(f"Searched {result['nodes']} nodes in {elapsed:.2f}s ({status})")
+
+
+if __name__ == '__main__':
+    main()
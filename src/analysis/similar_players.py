@@ -0,0 +1,269 @@
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+# Configuration
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data')
+ALL_PLAYERS_PKL_PATH = os.path.join(DATA_DIR, 'processed', 'all_players_df.pkl')
+
+# The seven role scores, already MinMax-scaled to [0, 1] by DataCleaning.ipynb
+ROLE_SCORE_COLUMNS = [
+    'firepower_score',
+    'entrying_score',
+    'trading_score',
+    'opening_score',
+    'clutching_score',
+    'sniping_score',
+    'utility_score',
+]
+
+SOLO_TEAM_NAME = 'no team'
+
+
+class SimilarPlayerIndex:
+    """
+    k-nearest-neighbour index over the normalized role-stat space.
+
+    The bulk of the players live in a KDTree per pool ('all' and 'solo'). Rows
+    added through update() go into a small pending buffer that is scanned
+    directly at query time, and the trees are only rebuilt once that buffer
+    (plus any replaced rows) grows past rebuild_threshold.
+
+    Players are keyed by real_name, since nicknames are not unique (e.g. two
+    players called steel). A nickname can still be used to look a player up
+    as long as it is not ambiguous.
+    """
+
+    POOLS = ('all', 'solo')
+
+    def __init__(self, columns: Sequence[str] = ROLE_SCORE_COLUMNS,
+                 leaf_size: int = 16, rebuild_threshold: int = 64):
+        self.columns = list(columns)
+        self.leaf_size = leaf_size
+        self.rebuild_threshold = rebuild_threshold
+
+        self._vectors = np.empty((0, len(self.columns)))
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._teams: List[str] = []
+        self._alive = np.empty(0, dtype=bool)
+        self._row_by_key: Dict[str, int] = {}
+        self._keys_by_name: Dict[str, List[str]] = {}
+
+        self._trees: Dict[str, Optional[KDTree]] = {pool: None for pool in self.POOLS}
+        self._tree_rows: Dict[str, np.ndarray] = {pool: np.empty(0, dtype=int) for pool in self.POOLS}
+        self._pending: List[int] = []
+        self._stale_count = 0
+
+    def __len__(self) -> int:
+        return len(self._row_by_key)
+
+    def __contains__(self, player: str) -> bool:
+        return player in self._row_by_key or player in self._keys_by_name
+
+    def build(self, players_df: pd.DataFrame) -> 'SimilarPlayerIndex':
+        keys, names, teams, vectors = self._extract(players_df)
+
+        self._vectors = vectors
+        self._keys = keys
+        self._names = names
+        self._teams = teams
+        self._alive = np.ones(len(keys), dtype=bool)
+        self._row_by_key = {}
+        self._keys_by_name = {}
+        for row in range(len(keys)):
+            # Later rows win, matching the "latest snapshot" semantics of update()
+            self._index_row(row)
+
+        self._rebuild_trees()
+        return self
+
+    def update(self, snapshot_df: pd.DataFrame) -> None:
+        """Insert new players and replace the vectors of ones already indexed."""
+        keys, names, teams, vectors = self._extract(snapshot_df)
+        if not keys:
+            return
+
+        start = len(self._keys)
+        self._vectors = np.vstack([self._vectors, vectors])
+        self._keys.extend(keys)
+        self._names.extend(names)
+        self._teams.extend(teams)
+        self._alive = np.concatenate([self._alive, np.ones(len(keys), dtype=bool)])
+
+        for row in range(start, len(self._keys)):
+            if self._index_row(row):
+                self._stale_count += 1
+            self._pending.append(row)
+
+        if len(self._pending) + self._stale_count > self.rebuild_threshold:
+            self._rebuild_trees()
+
+    def vector(self, player: str) -> np.ndarray:
+        return self._vectors[self._resolve(player)].copy()
+
+    def query(self, target: Union[str, Sequence[float]], k: int = 5,
+              solo_only: bool = False) -> pd.DataFrame:
+        """
+        Return the k players closest to target, nearest first.
+
+        target is either an indexed player, by real name or unambiguous
+        nickname (the player itself is left out of the results), or a raw
+        vector in the order of self.columns.
+        """
+        pool = 'solo' if solo_only else 'all'
+        exclude_row = None
+        if isinstance(target, str):
+            exclude_row = self._resolve(target)
+            point = self._vectors[exclude_row]
+        else:
+            point = np.asarray(target, dtype=float)
+            if point.shape != (len(self.columns),):
+                raise ValueError(f"Expected a vector of length {len(self.columns)}, got shape {point.shape}")
+
+        candidate_rows, candidate_dists = self._tree_candidates(pool, point, k, exclude_row)
+
+        pending = [row for row in self._pending
+                   if self._alive[row] and row != exclude_row and self._in_pool(row, pool)]
+        if pending:
+            pending_rows = np.asarray(pending)
+            pending_dists = np.linalg.norm(self._vectors[pending_rows] - point, axis=1)
+            candidate_rows = np.concatenate([candidate_rows, pending_rows])
+            candidate_dists = np.concatenate([candidate_dists, pending_dists])
+
+        order = np.argsort(candidate_dists, kind='stable')[:k]
+        rows = candidate_rows[order]
+        return pd.DataFrame({
+            'player_name': [self._names[row] for row in rows],
+            'real_name': [self._keys[row] for row in rows],
+            'team': [self._teams[row] for row in rows],
+            'distance': candidate_dists[order],
+        })
+
+    def _resolve(self, player: str) -> int:
+        """Row of a player given by real name or, if only one player has it, by nickname."""
+        if player in self._row_by_key:
+            return self._row_by_key[player]
+        keys = self._keys_by_name.get(player, [])
+        if not keys:
+            raise KeyError(f"Player not in index: {player}")
+        if len(keys) > 1:
+            options = ', '.join(f"{key} ({self._teams[self._row_by_key[key]]})" for key in keys)
+            raise KeyError(f"Several players are called {player}, use the real name: {options}")
+        return self._row_by_key[keys[0]]
+
+    def _index_row(self, row: int) -> bool:
+        """Make row the live one for its player and return whether it replaced an older row."""
+        key, name = self._keys[row], self._names[row]
+        old_row = self._row_by_key.get(key)
+        if old_row is not None:
+            self._alive[old_row] = False
+            old_keys = self._keys_by_name[self._names[old_row]]
+            old_keys.remove(key)
+            if not old_keys:
+                del self._keys_by_name[self._names[old_row]]
+        self._row_by_key[key] = row
+        self._keys_by_name.setdefault(name, []).append(key)
+        return old_row is not None
+
+    def _tree_candidates(self, pool: str, point: np.ndarray, k: int, exclude_row: Optional[int]):
+        tree = self._trees[pool]
+        tree_rows = self._tree_rows[pool]
+        if tree is None or len(tree_rows) == 0:
+            return np.empty(0, dtype=int), np.empty(0)
+
+        # Over-fetch by the number of rows that may have to be thrown away
+        fetch = min(len(tree_rows), k + self._stale_count + (exclude_row is not None))
+        dists, positions = tree.query(point.reshape(1, -1), k=fetch)
+        rows = tree_rows[positions[0]]
+        keep = self._alive[rows]
+        if exclude_row is not None:
+            keep &= rows != exclude_row
+        return rows[keep], dists[0][keep]
+
+    def _in_pool(self, row: int, pool: str) -> bool:
+        return pool == 'all' or self._teams[row] == SOLO_TEAM_NAME
+
+    def _rebuild_trees(self) -> None:
+        if self._stale_count:
+            self._compact()
+
+        teams = np.asarray(self._teams, dtype=object)
+        pool_masks = {
+            'all': self._alive,
+            'solo': self._alive & (teams == SOLO_TEAM_NAME),
+        }
+        for pool, mask in pool_masks.items():
+            rows = np.flatnonzero(mask)
+            self._tree_rows[pool] = rows
+            self._trees[pool] = KDTree(self._vectors[rows], leaf_size=self.leaf_size) if len(rows) else None
+
+        self._pending = []
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive)
+        self._vectors = self._vectors[keep]
+        self._keys = [self._keys[row] for row in keep]
+        self._names = [self._names[row] for row in keep]
+        self._teams = [self._teams[row] for row in keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._row_by_key = {key: row for row, key in enumerate(self._keys)}
+        self._keys_by_name = {}
+        for key, name in zip(self._keys, self._names):
+            self._keys_by_name.setdefault(name, []).append(key)
+        self._stale_count = 0
+
+    def _extract(self, players_df: pd.DataFrame):
+        missing = [col for col in self.columns if col not in players_df.columns]
+        if missing:
+            raise ValueError(f"Missing role stat columns: {missing}")
+
+        # solo_players_df keeps player_name as the index, all_players_df as a column
+        if 'player_name' in players_df.columns:
+            names = players_df['player_name'].astype(str).tolist()
+        else:
+            names = players_df.index.astype(str).tolist()
+        # real_name is the unique key (as in the cleaning notebooks); fall back to the nickname without it
+        if 'real_name' in players_df.columns:
+            keys = [name if pd.isna(real_name) else str(real_name)
+                    for name, real_name in zip(names, players_df['real_name'])]
+        else:
+            keys = list(names)
+        teams = players_df['team'].fillna(SOLO_TEAM_NAME).str.lower().tolist()
+        vectors = players_df[self.columns].fillna(0.0).to_numpy(dtype=float)
+        return keys, names, teams, vectors
+
+
+def load_index(file_path: str = ALL_PLAYERS_PKL_PATH) -> SimilarPlayerIndex:
+    players_df = pd.read_pickle(file_path)
+    return SimilarPlayerIndex().build(players_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the players whose role stats are closest to a given player.")
+    parser.add_argument('player_name', help="Player name or, for shared nicknames, real name as in all_players_df (e.g. ZywOo)")
+    parser.add_argument('-k', type=int, default=5, help="Number of similar players to return")
+    parser.add_argument('--solo', action='store_true', help="Only search free agents (team == 'no team')")
+    parser.add_argument('--data', default=ALL_PLAYERS_PKL_PATH, help="Path to the cleaned players pickle")
+    args = parser.parse_args()
+
+    index = load_index(args.data)
+
+    start = time.perf_counter()
+    try:
+        neighbours = index.query(args.player_name, k=args.k, solo_only=args.solo)
+    except KeyError as e:
+        parser.error(e.args[0])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(neighbours.to_string(index=False))
+    print(f"\nQuery took {elapsed_ms:.3f} ms over {len(index)} players")
+
+
+if __name__ == '__main__':
+    main()
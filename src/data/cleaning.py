@@ -0,0 +1,238 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+# The cleaning steps from notebooks/DataCleaning.ipynb as importable functions, so they can be
+# reused by scripts and benchmarked without running the notebook.
+
+SOLO_TEAM_NAME = 'no team'
+
+# Columns the generic conversion in process_dataframe misses
+MISSED_COLUMNS = [
+    'Role Stats_Trading_Assisted kills percentage',  # 16.1%
+    'Role Stats_Firepower_Pistol round rating',  # 1.42
+    'Role Stats_Clutching_Time alive per round',  # 1m 10s
+]
+
+DUPLICATE_COLUMNS = [
+    'Role Stats_Firepower_Rating 2.0',
+    'Detailed Stats_Rating 1.0',
+    'Detailed Stats_Rating 2.0',
+    'Role Stats_Firepower_Pistol round rating',
+]
+
+COLUMN_MAPPING = {
+    # Basic Info
+    'Basic Info_Player Name': 'player_name',
+    'Basic Info_Real Name': 'real_name',
+    'Basic Info_Team Name': 'team',
+    'Basic Info_Age': 'age',
+
+    # Summary Stats
+    'Summary Stats_Rating': 'rating',
+    'Summary Stats_DPR': 'dpr',
+    'Summary Stats_KPR': 'kpr',
+    'Summary Stats_KAST': 'kast',
+    'Summary Stats_Impact': 'impact',
+    'Summary Stats_ADR': 'adr',
+    'Summary Stats_Rating_is_missing': 'rating_is_missing',
+
+    # Detailed Stats
+    'Detailed Stats_Total kills': 'total_kills',
+    'Detailed Stats_Total deaths': 'total_deaths',
+    'Detailed Stats_Rounds played': 'rounds_played',
+    'Detailed Stats_K/D Ratio': 'kd_ratio',
+    'Detailed Stats_Maps played': 'maps_played',
+    'Detailed Stats_Kills / round': 'kills_per_round',
+    'Detailed Stats_Deaths / round': 'deaths_per_round',
+    'Detailed Stats_Assists / round': 'assists_per_round',
+    'Detailed Stats_Saved by teammate / round': 'saved_by_teammate_per_round',
+    'Detailed Stats_Saved teammates / round': 'saved_teammates_per_round',
+    'Detailed Stats_Damage / Round': 'damage_per_round',
+    'Detailed Stats_Grenade dmg / Round': 'grenade_damage_per_round',
+    'Detailed Stats_Headshot %': 'headshot_percentage',
+
+    # Role Stats - Firepower
+    'Role Stats_Firepower_Score': 'firepower_score',
+    'Role Stats_Firepower_Kills per round': 'firepower_kills_per_round',
+    'Role Stats_Firepower_Damage per round': 'firepower_damage_per_round',
+    'Role Stats_Firepower_Kills per round win': 'firepower_kills_per_round_win',
+    'Role Stats_Firepower_Damage per round win': 'firepower_damage_per_round_win',
+    'Role Stats_Firepower_Rounds with a kill': 'firepower_rounds_with_kill',
+    'Role Stats_Firepower_Rounds with a multi-kill': 'firepower_rounds_with_multi_kill',
+
+    # Role Stats - Opening
+    'Role Stats_Opening_Score': 'opening_score',
+    'Role Stats_Opening_Opening kills per round': 'opening_kills_per_round',
+    'Role Stats_Opening_Opening deaths per round': 'opening_deaths_per_round',
+    'Role Stats_Opening_Opening attempts': 'opening_attempts',
+    'Role Stats_Opening_Opening success': 'opening_success',
+    'Role Stats_Opening_Win% after opening kill': 'win_percentage_after_opening_kill',
+    'Role Stats_Opening_Attacks per round': 'opening_attacks_per_round',
+
+    # Role Stats - Clutching
+    'Role Stats_Clutching_Score': 'clutching_score',
+    'Role Stats_Clutching_Clutch points per round': 'clutch_points_per_round',
+    'Role Stats_Clutching_1on1 win percentage': 'clutch_1on1_win_percentage',
+    'Role Stats_Clutching_Time alive per round': 'clutch_time_alive_per_round',
+    'Role Stats_Clutching_Saves per round loss': 'clutch_saves_per_round_loss',
+    'Role Stats_Clutching_Last alive percentage': 'clutch_last_alive_percentage',
+
+    # Role Stats - Entrying
+    'Role Stats_Entrying_Score': 'entrying_score',
+    'Role Stats_Entrying_Saved by teammate per round': 'entrying_saved_by_teammate_per_round',
+    'Role Stats_Entrying_Traded deaths per round': 'entrying_traded_deaths_per_round',
+    'Role Stats_Entrying_Traded deaths percentage': 'entrying_traded_deaths_percentage',
+    'Role Stats_Entrying_Opening deaths traded percentage': 'entrying_opening_deaths_traded_percentage',
+    'Role Stats_Entrying_Assists per round': 'entrying_assists_per_round',
+    'Role Stats_Entrying_Support rounds': 'entrying_support_rounds',
+
+    # Role Stats - Trading
+    'Role Stats_Trading_Score': 'trading_score',
+    'Role Stats_Trading_Trade kills per round': 'trading_kills_per_round',
+    'Role Stats_Trading_Trade kills percentage': 'trading_kills_percentage',
+    'Role Stats_Trading_Assisted kills percentage': 'trading_assisted_kills_percentage',
+    'Role Stats_Trading_Damage per kill': 'trading_damage_per_kill',
+    'Role Stats_Trading_Saved teammate per round': 'trading_saved_teammate_per_round',
+
+    # Role Stats - Sniping
+    'Role Stats_Sniping_Score': 'sniping_score',
+    'Role Stats_Sniping_Sniper kills per round': 'sniping_kills_per_round',
+    'Role Stats_Sniping_Sniper kills percentage': 'sniping_kills_percentage',
+    'Role Stats_Sniping_Rounds with sniper kills percentage': 'sniping_rounds_with_kills_percentage',
+    'Role Stats_Sniping_Sniper multi-kill rounds': 'sniping_multi_kill_rounds',
+    'Role Stats_Sniping_Sniper opening kills per round': 'sniping_opening_kills_per_round',
+
+    # Role Stats - Utility
+    'Role Stats_Utility_Score': 'utility_score',
+    'Role Stats_Utility_Utility damage per round': 'utility_damage_per_round',
+    'Role Stats_Utility_Utility kills per 100 rounds': 'utility_kills_per_100_rounds',
+    'Role Stats_Utility_Flashes thrown per round': 'utility_flashes_thrown_per_round',
+    'Role Stats_Utility_Flash assists per round': 'utility_flash_assists_per_round',
+    'Role Stats_Utility_Time opponent flashed per round': 'utility_time_opponent_flashed_per_round'
+}
+
+# Column order after renaming (the mapping is already grouped the way the notebook orders them)
+COLUMN_ORDER = list(COLUMN_MAPPING.values())
+
+def is_numeric_column(series: pd.Series) -> bool:
+    numeric_sample = series.dropna().sample(min(len(series.dropna()), 100), random_state=0)
+    return all(isinstance(x, str) and (
+        ('/' in x) or
+        (x.replace('.', '').replace('-', '').isdigit()) or
+        (x.rstrip('%').replace('.', '').replace('-', '').isdigit()) or
+        (x.split()[0].replace('.', '').replace('-', '').isdigit()) or  # For handling "23 years" format
+        x.strip() == '-'  # Handle lone dash
+    ) for x in numeric_sample)
+
+def convert_to_numeric(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if '/' in value:
+            numerator, denominator = value.split('/')
+            return float(numerator) / float(denominator)
+        elif value.endswith('%'):
+            return float(value.rstrip('%')) / 100
+        elif value.endswith('years'):
+            return float(value.split()[0])
+        elif value == '-':
+            return np.nan
+        else:
+            try:
+                return float(value)
+            except ValueError:
+                return np.nan
+    return value
+
+def convert_percentage(value):
+    if isinstance(value, str) and value.endswith('%'):
+        return float(value.rstrip('%')) / 100
+    return value
+
+def convert_rating(value):
+    if isinstance(value, str):
+        if value == '-':
+            return np.nan
+        else:
+            return float(value)
+    return value
+
+def convert_time(value):
+    if isinstance(value, str):
+        parts = value.split()
+        minutes = int(parts[0].rstrip('m'))
+        seconds = int(parts[1].rstrip('s'))
+        return minutes * 60 + seconds  # Convert to total seconds
+    return value
+
+def text_columns(df: pd.DataFrame) -> List[str]:
+    return df.select_dtypes(include=['object', 'string']).columns.tolist()
+
+def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    for col in text_columns(df):
+        if is_numeric_column(df[col]) or 'Rating' in col or col == 'Basic Info_Age':
+            df[col] = df[col].apply(convert_to_numeric)
+    return df
+
+def convert_missed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for col in MISSED_COLUMNS:
+        if col in df.columns:
+            if 'percentage' in col.lower():
+                df[col] = df[col].apply(convert_percentage)
+            elif 'rating' in col.lower():
+                df[col] = df[col].apply(convert_rating)
+            elif 'time' in col.lower():
+                df[col] = df[col].apply(convert_time)
+    return df
+
+def convert_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """All string-to-number conversions of the raw scraped table."""
+    df = df.drop(columns='URL', errors='ignore')
+
+    # Handle strange age data like "23 years (2000-2024)"
+    df['Basic Info_Age'] = df['Basic Info_Age'].astype(str).str.replace(r'^(\d+) years.*$', r'\1 years', regex=True)
+
+    df = process_dataframe(df)
+    return convert_missed_columns(df)
+
+def clean_player_data(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Raw deep_player_data.csv table to the renamed, MinMax-normalized player table indexed by player_name."""
+    df = convert_numeric_columns(raw_df.copy())
+    df = df.drop(columns=DUPLICATE_COLUMNS, errors='ignore')
+
+    # Combine the two rating columns (1.0 and 2.0) into a single column
+    df['Summary Stats_Rating'] = df['Summary Stats_Rating 1.0'].fillna(df['Summary Stats_Rating 2.0'])
+    df['Summary Stats_Rating_is_missing'] = df['Summary Stats_Rating'].isna().astype(int)
+    df = df.drop(columns=['Summary Stats_Rating 1.0', 'Summary Stats_Rating 2.0'])
+
+    df = df.rename(columns=COLUMN_MAPPING)
+    df = df[COLUMN_ORDER]
+    df = df.set_index('player_name', verify_integrity=False)
+
+    # Normalize the numerical data (excluding 'age' and 'rating_is_missing')
+    numerical_columns = [col for col in df.select_dtypes(include=[np.number]).columns
+                         if col not in ['age', 'rating_is_missing']]
+    df[numerical_columns] = MinMaxScaler().fit_transform(df[numerical_columns])
+
+    # Standardize team names to lowercase
+    df['team'] = df['team'].str.lower()
+    return df
+
+def split_teams(df: pd.DataFrame) -> Tuple[Dict[str, pd.DataFrame], pd.DataFrame]:
+    """Per-team frames from every row, and the free agents deduplicated by real_name keeping the highest rating."""
+    df_sorted = df.sort_values('rating', ascending=False)
+    df_unique_players = df_sorted.drop_duplicates(subset='real_name', keep='first')
+
+    team_dfs = {}
+    for team in df['team'].unique():
+        if team != SOLO_TEAM_NAME:
+            team_dfs[team] = df[df['team'] == team].copy()
+
+    solo_players_df = df_unique_players[df_unique_players['team'] == SOLO_TEAM_NAME].copy()
+    return team_dfs, solo_players_df
+
+def combine_players(team_dfs: Dict[str, pd.DataFrame], solo_players_df: pd.DataFrame) -> pd.DataFrame:
+    """The all_players_df table: every team player plus the free agents, with player_name as a column."""
+    return pd.concat(list(team_dfs.values()) + [solo_players_df]).reset_index()
@@ -1,13 +1,37 @@
-import requests
-from bs4 import BeautifulSoup
+from __future__ import annotations
+
+import argparse
 import csv
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 import time
 import random
+import os
+
+from instrumentation import METRICS, start_metrics_server
+from user_agents import USER_AGENTS, random_user_agent
+
+# requests and BeautifulSoup are imported where they are first needed, so importing this
+# module (e.g. for read_urls_from_csv) or running --help does not load them.
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
 
 # Configuration
+HLTV_BASE_URL = os.environ.get('HLTV_BASE_URL', 'https://www.hltv.org')  # override to point at a local replay server
 INPUT_CSV_FILE_PATH = '../data/player_urls.csv'
 OUTPUT_CSV_FILE_PATH = '../data/deep_player_data.csv'
+METRICS_REPORT_PATH = '../data/deep_player_data_metrics.json'
+
+# Sent with every request; each session also gets a User-Agent from the bundled pool
+HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Referer': 'https://www.hltv.org/',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0',
+}
 
 def read_urls_from_csv(file_path: str) -> List[str]:
     with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
@@ -15,33 +39,51 @@ def read_urls_from_csv(file_path: str) -> List[str]:
         next(reader)  # Skip the header row
         return [row[0] for row in reader if row]
 
-def fetch_page(url: str) -> str:
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Referer': 'https://www.hltv.org/',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Cache-Control': 'max-age=0',
-    }
+def create_session(timeout: Optional[float] = None) -> requests.Session:
+    import requests
+
+    session = requests.Session()
+    use_browser_headers(session)
+    
+    # Visit the main page first to set cookies
+    session.get(f"{HLTV_BASE_URL}/", timeout=timeout)
+    return session
+
+def use_browser_headers(session: requests.Session) -> None:
+    """Send HEADERS and one pooled User-Agent for the whole session, so it matches the cookies it gets."""
+    session.headers.update(HEADERS)
+    session.headers['User-Agent'] = random_user_agent()
+
+def fetch_page(url: str, session: Optional[requests.Session] = None, delay: bool = True,
+               timeout: Optional[float] = None) -> str:
+    import requests
+
     url_with_param = f"{url}?startDate=all"
     
     # Randomize the delay between requests (2 to 5 seconds)
-    time.sleep(random.uniform(2, 5))
-    
-    session = requests.Session()
-    
-    # First, visit the main page to set cookies
-    session.get("https://www.hltv.org/", headers=headers)
+    if delay:
+        with METRICS.timer('delay', url=url):
+            time.sleep(random.uniform(2, 5))
     
-    # Then visit the actual player page
-    response = session.get(url_with_param, headers=headers)
-    response.raise_for_status()
-    return response.text
+    with METRICS.timer('fetch', url=url):
+        if session is None:
+            session = create_session(timeout)
+        elif session.headers.get('User-Agent') not in USER_AGENTS:
+            use_browser_headers(session)
+        
+        # Visit the actual player page
+        try:
+            response = session.get(url_with_param, timeout=timeout)
+        except requests.RequestException as e:
+            METRICS.inc('http_errors_total', error=type(e).__name__)
+            raise
+        METRICS.record_response(response.status_code, len(response.content))
+        response.raise_for_status()
+        return response.text
 
 def extract_player_data(html: str) -> Dict[str, Any]:
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, 'html.parser')
     return {
         'Basic Info': extract_basic_info(soup),
@@ -134,20 +176,31 @@ def flatten_player_data(player_data: Dict[str, Any]) -> Dict[str, str]:
 def process_url(url: str) -> Dict[str, str]:
     try:
         html = fetch_page(url)
-        player_data = extract_player_data(html)
-        flat_data = flatten_player_data(player_data)
+        with METRICS.timer('parse', url=url):
+            player_data = extract_player_data(html)
+        with METRICS.timer('flatten', url=url):
+            flat_data = flatten_player_data(player_data)
         flat_data['URL'] = url
         player_name = flat_data.get('Basic Info_Player Name', 'Unknown Player')
         print(f"Data gathered for {player_name} - {len(flat_data)} data points")
+        METRICS.inc('urls_total', result='ok')
         return flat_data
     except Exception as e:
         print(f"An error occurred while processing {url}: {e}")
+        METRICS.inc('urls_total', result='error')
         return {}
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape the full stats profile of every player URL in a CSV.")
+    parser.add_argument('--input', default=INPUT_CSV_FILE_PATH, help="CSV of player profile URLs")
+    parser.add_argument('--output', default=OUTPUT_CSV_FILE_PATH)
+    parser.add_argument('--metrics-report', default=METRICS_REPORT_PATH, help="Where to write the run's metrics JSON")
+    args = parser.parse_args()
+
+    start_metrics_server()
     try:
-        player_urls = read_urls_from_csv(INPUT_CSV_FILE_PATH)
-        print(f"Loaded {len(player_urls)} URLs from {INPUT_CSV_FILE_PATH}")
+        player_urls = read_urls_from_csv(args.input)
+        print(f"Loaded {len(player_urls)} URLs from {args.input}")
 
         all_player_data = []
         processed_count = 0
@@ -168,15 +221,17 @@ def main():
                 for player_data in all_player_data:
                     fieldnames.update(player_data.keys())
 
-                with open(OUTPUT_CSV_FILE_PATH, 'w', newline='', encoding='utf-8') as csvfile:
+                with METRICS.timer('write'), open(args.output, 'w', newline='', encoding='utf-8') as csvfile:
                     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                     writer.writeheader()
                     for player_data in all_player_data:
                         writer.writerow(player_data)
                 
-                print(f"Player data successfully scraped and saved to {OUTPUT_CSV_FILE_PATH}")
+                print(f"Player data successfully scraped and saved to {args.output}")
             
             print(f"Total players processed: {processed_count} out of {len(player_urls)}")
+            METRICS.write_report(args.metrics_report)
+            print(f"Run report saved to {args.metrics_report}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
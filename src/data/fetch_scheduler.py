@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from deepplayerdata import create_session, extract_player_data, fetch_page, flatten_player_data, read_urls_from_csv
+from instrumentation import METRICS, start_metrics_server
+
+# requests is only needed once profiles are fetched; --dry-run never loads it
+if TYPE_CHECKING:
+    import requests
+
+# Configuration
+RAW_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'raw')
+PLAYER_URLS_CSV_PATH = os.path.join(RAW_DATA_DIR, 'player_urls.csv')
+LEADERBOARD_CSV_PATH = os.path.join(RAW_DATA_DIR, 'hltv_player_stats.csv')
+DEEP_PLAYER_DATA_CSV_PATH = os.path.join(RAW_DATA_DIR, 'deep_player_data.csv')
+QUEUE_DB_PATH = os.path.join(RAW_DATA_DIR, 'fetch_queue.sqlite')
+METRICS_REPORT_PATH = os.path.join(RAW_DATA_DIR, 'fetch_scheduler_metrics.json')
+
+# Priority = (seconds since last fetch + NEVER_FETCHED_AGE if never fetched) * importance
+NEVER_FETCHED_AGE = 365 * 24 * 3600
+MIN_REFETCH_AGE = 6 * 3600  # profiles refreshed more recently than this are not due
+RATING_WEIGHT = 2.0  # rating percentile on the leaderboard
+TEAM_TIER_WEIGHT = 1.0  # percentile of the team's mean leaderboard rating, 0 for teamless players
+ACTIVITY_WEIGHT = 1.0  # how often the profile actually changed when we refetched it
+ACTIVITY_DECAY = 0.5  # weight of the previous activity value in the moving average
+
+MIN_REQUEST_INTERVAL = 2.0  # seconds
+MAX_REQUEST_INTERVAL = 120.0
+INITIAL_REQUEST_INTERVAL = 3.5
+SPEEDUP_FACTOR = 0.95  # interval multiplier after a successful request
+SLOWDOWN_FACTOR = 2.0  # interval multiplier after a 429
+REQUEST_TIMEOUT = 30.0  # seconds, further capped by what is left of the time budget
+FAILURE_BACKOFF = 3600.0  # seconds before a failed URL is retried, doubled per consecutive failure
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (
+    url TEXT PRIMARY KEY,
+    importance REAL NOT NULL DEFAULT 1.0,
+    rating_pct REAL NOT NULL DEFAULT 0.0,
+    team_pct REAL NOT NULL DEFAULT 0.0,
+    activity REAL NOT NULL DEFAULT 0.5,
+    last_fetched REAL,
+    content_hash TEXT,
+    fail_count INTEGER NOT NULL DEFAULT 0,
+    next_allowed REAL NOT NULL DEFAULT 0.0
+)
+'''
+
+def open_queue(db_path: str = QUEUE_DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute(SCHEMA)
+    return conn
+
+def percentile_ranks(values: Dict[str, float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values, key=values.get)
+    if len(ordered) == 1:
+        return {ordered[0]: 1.0}
+    return {key: rank / (len(ordered) - 1) for rank, key in enumerate(ordered)}
+
+def read_leaderboard(file_path: str) -> Dict[str, Dict[str, float]]:
+    """Rating and team tier percentiles per player URL from the scrape.py leaderboard CSV."""
+    if not os.path.exists(file_path):
+        return {}
+
+    ratings = {}
+    teams = {}
+    with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            try:
+                ratings[row['player_url']] = float(row['rating'])
+            except (KeyError, ValueError):
+                continue
+            teams[row['player_url']] = row.get('team') or 'Unknown'
+
+    team_ratings: Dict[str, List[float]] = {}
+    for url, team in teams.items():
+        if team != 'Unknown':
+            team_ratings.setdefault(team, []).append(ratings[url])
+    team_pct = percentile_ranks({team: sum(r) / len(r) for team, r in team_ratings.items()})
+    rating_pct = percentile_ranks(ratings)
+
+    return {url: {'rating_pct': rating_pct[url], 'team_pct': team_pct.get(teams[url], 0.0)} for url in ratings}
+
+def importance(rating_pct: float, team_pct: float, activity: float) -> float:
+    return 1.0 + RATING_WEIGHT * rating_pct + TEAM_TIER_WEIGHT * team_pct + ACTIVITY_WEIGHT * activity
+
+def sync_queue(conn: sqlite3.Connection, urls: List[str], leaderboard: Dict[str, Dict[str, float]]) -> None:
+    """Add new URLs and refresh the rating/team tier of existing ones. Fetch history is kept."""
+    for url in urls:
+        conn.execute('INSERT OR IGNORE INTO players (url) VALUES (?)', (url,))
+        info = leaderboard.get(url)
+        if info:
+            conn.execute('UPDATE players SET rating_pct = ?, team_pct = ? WHERE url = ?',
+                         (info['rating_pct'], info['team_pct'], url))
+
+    rows = conn.execute('SELECT url, rating_pct, team_pct, activity FROM players').fetchall()
+    conn.executemany('UPDATE players SET importance = ? WHERE url = ?',
+                     [(importance(rating_pct, team_pct, activity), url)
+                      for url, rating_pct, team_pct, activity in rows])
+    conn.commit()
+
+def top_urls(conn: sqlite3.Connection, now: float, limit: int = 1) -> List[Tuple[str, float]]:
+    """Highest-priority URLs that are due, i.e. not in failure backoff and not refreshed too recently."""
+    return conn.execute(
+        'SELECT url, (? - COALESCE(last_fetched, ? - ?)) * importance AS priority FROM players '
+        'WHERE next_allowed <= ? AND (last_fetched IS NULL OR last_fetched <= ?) '
+        'ORDER BY priority DESC LIMIT ?',
+        (now, now, NEVER_FETCHED_AGE, now, now - MIN_REFETCH_AGE, limit),
+    ).fetchall()
+
+def next_url(conn: sqlite3.Connection, now: float) -> Optional[str]:
+    rows = top_urls(conn, now)
+    return rows[0][0] if rows else None
+
+def record_success(conn: sqlite3.Connection, url: str, content_hash: str, now: float) -> bool:
+    """Mark url as refreshed and return whether its content changed since the last fetch."""
+    rating_pct, team_pct, activity, old_hash = conn.execute(
+        'SELECT rating_pct, team_pct, activity, content_hash FROM players WHERE url = ?', (url,)).fetchone()
+    changed = 1.0 if old_hash is None or old_hash != content_hash else 0.0
+    activity = ACTIVITY_DECAY * activity + (1 - ACTIVITY_DECAY) * changed
+    conn.execute(
+        'UPDATE players SET last_fetched = ?, content_hash = ?, activity = ?, importance = ?, '
+        'fail_count = 0, next_allowed = 0 WHERE url = ?',
+        (now, content_hash, activity, importance(rating_pct, team_pct, activity), url),
+    )
+    conn.commit()
+    return bool(changed)
+
+def record_failure(conn: sqlite3.Connection, url: str, now: float) -> None:
+    (fail_count,) = conn.execute('SELECT fail_count FROM players WHERE url = ?', (url,)).fetchone()
+    conn.execute('UPDATE players SET fail_count = ?, next_allowed = ? WHERE url = ?',
+                 (fail_count + 1, now + FAILURE_BACKOFF * (2 ** fail_count), url))
+    conn.commit()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, which is either a number of seconds or an HTTP date."""
+    import email.utils
+
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RateLimiter:
+    """
+    Spaces requests out by an interval that shrinks slowly after each success
+    and doubles after every 429, honouring Retry-After when the server sends it.
+    """
+
+    def __init__(self, interval: float = INITIAL_REQUEST_INTERVAL,
+                 min_interval: float = MIN_REQUEST_INTERVAL, max_interval: float = MAX_REQUEST_INTERVAL):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.next_request_at = 0.0
+
+    def wait(self) -> None:
+        delay = self.next_request_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self) -> None:
+        self.interval = max(self.min_interval, self.interval * SPEEDUP_FACTOR)
+        self.next_request_at = time.monotonic() + self.interval
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        self.interval = min(self.max_interval, self.interval * SLOWDOWN_FACTOR)
+        pause = max(self.interval, retry_after or 0.0)
+        self.next_request_at = time.monotonic() + pause
+
+    def on_error(self) -> None:
+        self.next_request_at = time.monotonic() + self.interval
+
+def merge_into_csv(new_rows: Dict[str, Dict[str, str]], file_path: str) -> None:
+    """Replace the rows of refreshed URLs in the deep player data CSV and append new ones."""
+    rows: Dict[str, Dict[str, str]] = {}
+    if os.path.exists(file_path):
+        with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                rows[row.get('URL', '')] = row
+    rows.update(new_rows)
+
+    fieldnames = set()
+    for row in rows.values():
+        fieldnames.update(row.keys())
+
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=sorted(fieldnames))
+        writer.writeheader()
+        for row in rows.values():
+            writer.writerow(row)
+    os.replace(tmp_path, file_path)
+
+def run(conn: sqlite3.Connection, time_budget: float, limiter: Optional[RateLimiter] = None,
+        session: Optional[requests.Session] = None) -> Dict[str, Dict[str, str]]:
+    """Refresh the highest-priority profiles until time_budget (seconds) runs out or nothing is due."""
+    limiter = limiter or RateLimiter()
+    deadline = time.monotonic() + time_budget
+    session = session or create_session(REQUEST_TIMEOUT)
+    refreshed = {}
+
+    try:
+        _run_loop(conn, deadline, limiter, session, refreshed)
+    except KeyboardInterrupt:
+        print("\nScript interrupted by user. Saving progress...")
+    return refreshed
+
+def _run_loop(conn: sqlite3.Connection, deadline: float, limiter: RateLimiter, session: requests.Session,
+              refreshed: Dict[str, Dict[str, str]]) -> None:
+    import requests
+
+    while True:
+        # Check before sleeping, so a long Retry-After pause cannot run past the budget
+        request_at = max(time.monotonic(), limiter.next_request_at)
+        if request_at + limiter.interval > deadline:
+            break
+        limiter.wait()
+        url = next_url(conn, time.time())
+        if url is None:
+            break
+
+        try:
+            timeout = min(REQUEST_TIMEOUT, max(1.0, deadline - time.monotonic()))
+            html = fetch_page(url, session=session, delay=False, timeout=timeout)
+        except requests.HTTPError as e:
+            response = e.response
+            if response is not None and response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                limiter.on_rate_limited(retry_after)
+                METRICS.inc('rate_limited_total')
+                print(f"Rate limited on {url}, request interval now {limiter.interval:.1f}s")
+                continue
+            print(f"An error occurred while processing {url}: {e}")
+            record_failure(conn, url, time.time())
+            limiter.on_error()
+            continue
+        except requests.RequestException as e:
+            print(f"An error occurred while processing {url}: {e}")
+            record_failure(conn, url, time.time())
+            limiter.on_error()
+            continue
+
+        limiter.on_success()
+        with METRICS.timer('parse', url=url):
+            player_data = extract_player_data(html)
+        with METRICS.timer('flatten', url=url):
+            flat_data = flatten_player_data(player_data)
+        flat_data['URL'] = url
+        refreshed[url] = flat_data
+        content_hash = hashlib.sha1(json.dumps(flat_data, sort_keys=True).encode('utf-8')).hexdigest()
+        changed = record_success(conn, url, content_hash, time.time())
+        METRICS.inc('profiles_total', result='changed' if changed else 'unchanged')
+        player_name = flat_data.get('Basic Info_Player Name', 'Unknown Player')
+        print(f"Data gathered for {player_name} - {len(flat_data)} data points")
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the most valuable and stalest player profiles first.")
+    parser.add_argument('--time-budget', type=float, default=3600, help="Stop after this many seconds")
+    parser.add_argument('--urls', default=PLAYER_URLS_CSV_PATH)
+    parser.add_argument('--leaderboard', default=LEADERBOARD_CSV_PATH)
+    parser.add_argument('--output', default=DEEP_PLAYER_DATA_CSV_PATH)
+    parser.add_argument('--db', default=QUEUE_DB_PATH)
+    parser.add_argument('--dry-run', action='store_true', help="Only print the 20 highest-priority URLs")
+    parser.add_argument('--metrics-report', default=METRICS_REPORT_PATH, help="Where to write the run's metrics JSON")
+    args = parser.parse_args()
+
+    conn = open_queue(args.db)
+    urls = read_urls_from_csv(args.urls)
+    sync_queue(conn, urls, read_leaderboard(args.leaderboard))
+    print(f"Loaded {len(urls)} URLs from {args.urls}")
+
+    if args.dry_run:
+        rows = top_urls(conn, time.time(), limit=20)
+        for url, priority in rows:
+            print(f"{priority:14.0f}  {url}")
+        conn.close()
+        return
+
+    start_metrics_server()
+    refreshed = run(conn, args.time_budget)
+    if refreshed:
+        with METRICS.timer('write'):
+            merge_into_csv(refreshed, args.output)
+        print(f"Player data successfully scraped and saved to {args.output}")
+    print(f"Total players refreshed: {len(refreshed)}")
+    METRICS.write_report(args.metrics_report)
+    print(f"Run metrics saved to {args.metrics_report}")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
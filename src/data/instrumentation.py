@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+# http.server pulls in the email and html packages; it is only imported when METRICS_PORT is set
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Configuration
+METRICS_PORT = os.environ.get('METRICS_PORT')  # set to expose /metrics while a scraper runs
+METRIC_PREFIX = 'scraper_'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SLOWEST_URLS_IN_REPORT = 20
+OPEN_URL_TIMINGS = 1000  # most recent URLs whose stage timings are still being added up
+UNRANKED_STAGES = ('delay', 'backoff')  # deliberate random waits, left out of the slowest-URL ranking
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+class Metrics:
+    """
+    Counters, histograms and the slowest URLs of one scraper run.
+
+    Per-URL stage timings are added up for the OPEN_URL_TIMINGS most recently
+    timed URLs only. Older ones are folded into a heap of the
+    SLOWEST_URLS_IN_REPORT slowest, so memory and the report stay bounded
+    however many URLs a run visits.
+
+    Everything is thread-safe, so the same instance can be shared by worker
+    threads and read by the /metrics endpoint while a run is in progress.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.url_timings: Dict[str, Dict[str, float]] = {}  # open URLs, oldest first
+        self._slowest_urls: List[Tuple[float, int, str, Dict[str, float]]] = []  # min-heap on ranked time
+        self._url_sequence = itertools.count()  # tie-breaker, so heap entries never compare their dicts
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, stage: str, url: Optional[str] = None) -> Iterator[None]:
+        """Time a stage (fetch, parse, flatten, write...) into stage_seconds, and per URL when one is given."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe('stage_seconds', elapsed, stage=stage)
+            if url is not None:
+                with self._lock:
+                    timings = self.url_timings.setdefault(url, {})
+                    timings[stage] = timings.get(stage, 0.0) + elapsed
+                    while len(self.url_timings) > OPEN_URL_TIMINGS:
+                        oldest = next(iter(self.url_timings))
+                        self._rank_url(self._slowest_urls, oldest, self.url_timings.pop(oldest))
+
+    def _rank_url(self, heap: List[Tuple[float, int, str, Dict[str, float]]], url: str,
+                  stages: Dict[str, float]) -> None:
+        """Keep url in heap if it is among the SLOWEST_URLS_IN_REPORT slowest, ignoring UNRANKED_STAGES."""
+        ranked_s = sum(seconds for stage, seconds in stages.items() if stage not in UNRANKED_STAGES)
+        entry = (ranked_s, next(self._url_sequence), url, stages)
+        if len(heap) < SLOWEST_URLS_IN_REPORT:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def record_response(self, status: int, n_bytes: int) -> None:
+        self.inc('http_responses_total', status=status)
+        self.inc('http_response_bytes_total', n_bytes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {name: {format_labels(key) or 'total': value for key, value in series.items()}
+                        for name, series in self.counters.items()}
+            histograms = {name: {format_labels(key) or 'all': hist.to_dict() for key, hist in series.items()}
+                          for name, series in self.histograms.items()}
+            slowest = list(self._slowest_urls)
+            for url, stages in self.url_timings.items():
+                self._rank_url(slowest, url, dict(stages))
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_s': time.time() - self.started_at,
+            'counters': counters,
+            'histograms': histograms,
+            'slowest_urls': [{'url': url, 'ranked_s': ranked_s, 'total_s': sum(stages.values()), 'stages': stages}
+                             for ranked_s, _, url, stages in sorted(slowest, reverse=True)],
+        }
+
+    def write_report(self, file_path: str) -> None:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f'# TYPE {METRIC_PREFIX}{name} counter')
+                for key, value in series.items():
+                    lines.append(f'{METRIC_PREFIX}{name}{format_labels(key)} {value}')
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f'# TYPE {METRIC_PREFIX}{name} histogram')
+                for key, hist in series.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                        cumulative += count
+                        bucket_labels = format_labels(key, 'le="%s"' % bound)
+                        lines.append(f'{METRIC_PREFIX}{name}_bucket{bucket_labels} {cumulative}')
+                    lines.append(f'{METRIC_PREFIX}{name}_sum{format_labels(key)} {hist.sum}')
+                    lines.append(f'{METRIC_PREFIX}{name}_count{format_labels(key)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Expose prometheus_text() on http://host:port/metrics from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+# Shared by the scrapers in this directory, like the logging module's root logger
+METRICS = Metrics()
+
+def start_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Serve METRICS if METRICS_PORT is set."""
+    if not METRICS_PORT:
+        return None
+    server = METRICS.serve(int(METRICS_PORT))
+    print(f"Serving metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+    return server
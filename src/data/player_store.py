@@ -0,0 +1,285 @@
+import argparse
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import duckdb
+import pandas as pd
+
+from cleaning import COLUMN_MAPPING, SOLO_TEAM_NAME
+
+# The cleaning.py logic (numeric conversions, rating merge, MinMax scaling, team split and
+# dedup by real_name) as DuckDB queries over a Hive-partitioned Parquet store of raw scraped
+# snapshots, so multi-season data never has to fit in memory:
+#
+#   data/store/players/season=<season>/snapshot=<snapshot>/data.parquet
+#
+# Every snapshot is cleaned on its own, exactly as clean_player_data would clean that CSV.
+# Snapshots are queried PARTITIONS_PER_QUERY at a time, so memory depends on the batch size
+# and MEMORY_LIMIT, not on how many snapshots the store holds.
+
+# Configuration
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'store', 'players')
+TEMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'store', 'tmp')
+MEMORY_LIMIT = '256MB'  # cap on DuckDB's buffer pool; sorts that outgrow it spill to TEMP_DIR
+PARTITIONS_PER_QUERY = 8  # snapshots per query: more amortizes query planning, fewer lowers peak memory
+CHUNK_ROWS = 5000  # rows per DataFrame handed back to Python
+
+Partition = Tuple[str, str]  # (season, snapshot)
+
+PARTITION_COLUMNS = ['season', 'snapshot']
+TEXT_COLUMNS = ['Basic Info_Player Name', 'Basic Info_Real Name', 'Basic Info_Team Name']
+AGE_COLUMN = 'Basic Info_Age'
+TIME_COLUMNS = ['Role Stats_Clutching_Time alive per round']
+RATING_COLUMNS = ['Summary Stats_Rating 1.0', 'Summary Stats_Rating 2.0']
+# Derived in the query rather than read from the raw snapshot
+DERIVED_COLUMNS = ['Summary Stats_Rating', 'Summary Stats_Rating_is_missing']
+UNSCALED_COLUMNS = ['age', 'rating_is_missing']  # the columns clean_player_data leaves out of MinMax scaling
+
+# convert_to_numeric and convert_time from cleaning.py; try_cast turns '-' and other text into NULL
+MACROS = [
+    r"""
+    CREATE OR REPLACE MACRO to_number(x) AS CASE
+        WHEN contains(trim(x), '/') THEN
+            try_cast(split_part(trim(x), '/', 1) AS DOUBLE) / try_cast(split_part(trim(x), '/', 2) AS DOUBLE)
+        WHEN ends_with(trim(x), '%') THEN try_cast(rtrim(trim(x), '%') AS DOUBLE) / 100
+        WHEN ends_with(trim(x), 'years') THEN try_cast(split_part(trim(x), ' ', 1) AS DOUBLE)
+        ELSE try_cast(trim(x) AS DOUBLE)
+    END
+    """,
+    r"""
+    CREATE OR REPLACE MACRO time_to_seconds(x) AS
+        try_cast(regexp_extract(x, '(-?\d+)m', 1) AS DOUBLE) * 60 + try_cast(regexp_extract(x, '(-?\d+)s', 1) AS DOUBLE)
+    """,
+]
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def connect(memory_limit: str = MEMORY_LIMIT, threads: Optional[int] = None,
+            temp_dir: str = TEMP_DIR) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB connection with the memory cap and cleaning macros set up."""
+    os.makedirs(temp_dir, exist_ok=True)
+    config: Dict[str, Any] = {
+        'memory_limit': memory_limit,
+        'temp_directory': temp_dir,
+        'preserve_insertion_order': False,  # lets scans stream instead of buffering to keep row order
+        'enable_external_file_cache': False,  # each file is read once per query; caching it only eats the cap
+    }
+    if threads:
+        config['threads'] = threads
+    con = duckdb.connect(config=config)
+    for macro in MACROS:
+        con.execute(macro)
+    return con
+
+def partition_dir(store_dir: str, season: str, snapshot: str) -> str:
+    return os.path.join(store_dir, f'season={season}', f'snapshot={snapshot}')
+
+def ingest_snapshot(con: duckdb.DuckDBPyConnection, csv_path: str, season: str, snapshot: str,
+                    store_dir: str = STORE_DIR) -> str:
+    """Store a raw deep_player_data.csv as one partition, replacing an earlier ingest of the same snapshot."""
+    path = os.path.join(partition_dir(store_dir, season, snapshot), 'data.parquet')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Kept as text, like the raw CSV; the conversions happen at query time
+    con.execute(f"COPY (SELECT * FROM read_csv(?, header = true, all_varchar = true)) "
+                f"TO {quote_literal(path)} (FORMAT PARQUET)", [csv_path])
+    return path
+
+def list_partitions(store_dir: str = STORE_DIR) -> List[Partition]:
+    partitions = []
+    if not os.path.isdir(store_dir):
+        return partitions
+    for season_dir in sorted(os.listdir(store_dir)):
+        if not season_dir.startswith('season='):
+            continue
+        for snapshot_dir in sorted(os.listdir(os.path.join(store_dir, season_dir))):
+            if snapshot_dir.startswith('snapshot='):
+                partitions.append((season_dir.split('=', 1)[1], snapshot_dir.split('=', 1)[1]))
+    return partitions
+
+def select_partitions(store_dir: str = STORE_DIR, seasons: Optional[Sequence[str]] = None,
+                      snapshots: Optional[Sequence[str]] = None) -> List[Partition]:
+    partitions = [(season, snapshot) for season, snapshot in list_partitions(store_dir)
+                  if (not seasons or season in seasons) and (not snapshots or snapshot in snapshots)]
+    if not partitions:
+        raise ValueError(f"No snapshots in {store_dir} match seasons={seasons} snapshots={snapshots}")
+    return partitions
+
+def batches(partitions: List[Partition], size: int = PARTITIONS_PER_QUERY) -> Iterator[List[Partition]]:
+    for start in range(0, len(partitions), size):
+        yield partitions[start:start + size]
+
+def raw_query(store_dir: str, partitions: Sequence[Partition]) -> str:
+    # Listing the partition files directly (rather than a glob plus WHERE) means unselected
+    # snapshots are never opened
+    paths = [os.path.join(partition_dir(store_dir, season, snapshot), '*.parquet') for season, snapshot in partitions]
+    return (f"SELECT * FROM read_parquet([{', '.join(quote_literal(path) for path in paths)}], "
+            f"hive_partitioning = true, hive_types_autocast = false, union_by_name = true)")
+
+def conversion_expression(raw_column: str) -> str:
+    column = quote(raw_column)
+    if raw_column == 'Basic Info_Team Name':
+        return f'lower({column})'
+    if raw_column in TEXT_COLUMNS:
+        return column
+    if raw_column == AGE_COLUMN:
+        # Handle strange age data like "23 years (2000-2024)"
+        return rf"to_number(regexp_replace({column}, '^(\d+) years.*$', '\1 years'))"
+    if raw_column in TIME_COLUMNS:
+        return f'time_to_seconds({column})'
+    return f'to_number({column})'
+
+def cleaned_query(store_dir: str, partitions: Sequence[Partition]) -> Tuple[str, List[str]]:
+    """SQL and parameters for clean_player_data applied to each of the given snapshots."""
+    rating = ', '.join(f'to_number({quote(column)})' for column in RATING_COLUMNS)
+    converted = [f'coalesce({rating}) AS rating']
+    for raw_column, column in COLUMN_MAPPING.items():
+        if raw_column not in DERIVED_COLUMNS:
+            converted.append(f'{conversion_expression(raw_column)} AS {quote(column)}')
+
+    text_columns = {COLUMN_MAPPING[column] for column in TEXT_COLUMNS}
+    scaled_columns = [column for column in COLUMN_MAPPING.values()
+                      if column not in text_columns and column not in UNSCALED_COLUMNS]
+    # Per-snapshot min and max, joined back as a single row per snapshot
+    bounds = [f'min({quote(column)}) AS {quote(column + "__min")}, max({quote(column)}) AS {quote(column + "__max")}'
+              for column in scaled_columns]
+
+    selected = []
+    for column in COLUMN_MAPPING.values():
+        if column == 'rating_is_missing':
+            selected.append('CAST(c.rating IS NULL AS INTEGER) AS rating_is_missing')
+        elif column in scaled_columns:
+            # MinMaxScaler maps a constant column to 0
+            low, high = quote(column + '__min'), quote(column + '__max')
+            selected.append(f'(c.{quote(column)} - b.{low}) / '
+                            f'CASE WHEN b.{high} > b.{low} THEN b.{high} - b.{low} ELSE 1 END AS {quote(column)}')
+        else:
+            selected.append(f'c.{quote(column)}')
+    selected.extend(f'c.{column}' for column in PARTITION_COLUMNS)
+
+    keys = ', '.join(PARTITION_COLUMNS)
+    sql = f"""
+        WITH raw AS ({raw_query(store_dir, partitions)}),
+        converted AS (SELECT {keys}, {', '.join(converted)} FROM raw),
+        bounds AS (SELECT {keys}, {', '.join(bounds)} FROM converted GROUP BY {keys})
+        SELECT {', '.join(selected)}
+        FROM converted c JOIN bounds b USING ({keys})
+    """
+    return sql, []
+
+def unique_players_query(store_dir: str, partitions: Sequence[Partition]) -> Tuple[str, List[str]]:
+    """One row per real_name and snapshot, keeping the highest rating (df_unique_players in the notebook)."""
+    sql, params = cleaned_query(store_dir, partitions)
+    return (f"SELECT * FROM ({sql}) QUALIFY row_number() OVER "
+            f"(PARTITION BY {', '.join(PARTITION_COLUMNS)}, real_name ORDER BY rating DESC NULLS LAST) = 1"), params
+
+def solo_players_query(store_dir: str, partitions: Sequence[Partition]) -> Tuple[str, List[str]]:
+    sql, params = unique_players_query(store_dir, partitions)
+    return f"SELECT * FROM ({sql}) WHERE team = ?", params + [SOLO_TEAM_NAME]
+
+def team_players_query(store_dir: str, partitions: Sequence[Partition]) -> Tuple[str, List[str]]:
+    """Every player on a team, ordered so each team's rows arrive together."""
+    sql, params = cleaned_query(store_dir, partitions)
+    return (f"SELECT * FROM ({sql}) WHERE team <> ? ORDER BY {', '.join(PARTITION_COLUMNS)}, team",
+            params + [SOLO_TEAM_NAME])
+
+QUERIES = {
+    'cleaned': cleaned_query,
+    'unique': unique_players_query,
+    'solo': solo_players_query,
+    'teams': team_players_query,
+}
+
+def iter_chunks(con: duckdb.DuckDBPyConnection, sql: str, params: Optional[List[str]] = None,
+                chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream a query's result as DataFrames of at most chunk_rows rows, indexed by player_name."""
+    reader = con.execute(sql, params or []).fetch_record_batch(chunk_rows)
+    for batch in reader:
+        if batch.num_rows:
+            yield batch.to_pandas().set_index('player_name')
+
+def iter_query(con: duckdb.DuckDBPyConnection, table: str, store_dir: str = STORE_DIR,
+               seasons: Optional[Sequence[str]] = None, snapshots: Optional[Sequence[str]] = None,
+               chunk_rows: int = CHUNK_ROWS, partitions_per_query: int = PARTITIONS_PER_QUERY) -> Iterator[pd.DataFrame]:
+    """Chunks of the cleaned, unique, solo or teams table over the selected snapshots (all by default)."""
+    for batch in batches(select_partitions(store_dir, seasons, snapshots), partitions_per_query):
+        sql, params = QUERIES[table](store_dir, batch)
+        yield from iter_chunks(con, sql, params, chunk_rows)
+
+def iter_team_frames(con: duckdb.DuckDBPyConnection, store_dir: str = STORE_DIR,
+                     seasons: Optional[Sequence[str]] = None, snapshots: Optional[Sequence[str]] = None,
+                     chunk_rows: int = CHUNK_ROWS,
+                     partitions_per_query: int = PARTITIONS_PER_QUERY) -> Iterator[Tuple[Tuple[str, str, str], pd.DataFrame]]:
+    """((season, snapshot, team), players) for every team, holding at most one team plus one chunk in memory."""
+    current_key, pieces = None, []
+    for chunk in iter_query(con, 'teams', store_dir, seasons, snapshots, chunk_rows, partitions_per_query):
+        keys = list(zip(chunk['season'], chunk['snapshot'], chunk['team']))
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                if keys[start] != current_key:
+                    if pieces:
+                        yield current_key, pd.concat(pieces)
+                    current_key, pieces = keys[start], []
+                pieces.append(chunk.iloc[start:i])
+                start = i
+    if pieces:
+        yield current_key, pd.concat(pieces)
+
+def iter_solo_players(con: duckdb.DuckDBPyConnection, store_dir: str = STORE_DIR,
+                      seasons: Optional[Sequence[str]] = None, snapshots: Optional[Sequence[str]] = None,
+                      chunk_rows: int = CHUNK_ROWS, partitions_per_query: int = PARTITIONS_PER_QUERY) -> Iterator[pd.DataFrame]:
+    return iter_query(con, 'solo', store_dir, seasons, snapshots, chunk_rows, partitions_per_query)
+
+def export(con: duckdb.DuckDBPyConnection, table: str, output_dir: str, store_dir: str = STORE_DIR,
+           seasons: Optional[Sequence[str]] = None, snapshots: Optional[Sequence[str]] = None,
+           partitions_per_query: int = PARTITIONS_PER_QUERY) -> List[str]:
+    """Write a table straight from DuckDB to Parquet files in output_dir, one file per batch of snapshots."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, batch in enumerate(batches(select_partitions(store_dir, seasons, snapshots), partitions_per_query)):
+        sql, params = QUERIES[table](store_dir, batch)
+        path = os.path.join(output_dir, f'part-{i:05d}.parquet')
+        con.execute(f"COPY ({sql}) TO {quote_literal(path)} (FORMAT PARQUET)", params)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned Parquet store of raw player snapshots.")
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--memory-limit', default=MEMORY_LIMIT)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Add a raw deep_player_data CSV as a snapshot")
+    ingest_parser.add_argument('csv')
+    ingest_parser.add_argument('--season', required=True)
+    ingest_parser.add_argument('--snapshot', required=True, help="Snapshot label, e.g. the scrape date 2024-09-27")
+
+    subparsers.add_parser('list', help="Show the stored snapshots")
+
+    export_parser = subparsers.add_parser('export', help="Write a cleaned view of the store to Parquet files")
+    export_parser.add_argument('table', choices=list(QUERIES))
+    export_parser.add_argument('output_dir')
+    export_parser.add_argument('--seasons', nargs='+')
+    export_parser.add_argument('--snapshots', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for season, snapshot in list_partitions(args.store):
+            print(f"season={season} snapshot={snapshot}")
+        return
+
+    con = connect(args.memory_limit)
+    if args.command == 'ingest':
+        path = ingest_snapshot(con, args.csv, args.season, args.snapshot, args.store)
+        print(f"Stored {args.csv} as {path}")
+    elif args.command == 'export':
+        paths = export(con, args.table, args.output_dir, args.store, args.seasons, args.snapshots)
+        print(f"Exported {args.table} players to {len(paths)} file(s) in {args.output_dir}")
+    con.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Configuration
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'recordings')
+RECORDINGS_INDEX = 'index.json'
+LEADERBOARD_PAGE_SIZE = 50
+RECORD_TIMEOUT = 30  # seconds per page fetched by the record command
+RATING_1_SHARE = 412 / 968  # share of profiles in the real scrape still shown with Rating 1.0
+ROLE_CATEGORIES = ['firepower', 'entrying', 'trading', 'opening', 'clutching', 'sniping', 'utility']
+
+# Substat names as they appear on real profile pages, with how to render a random value for each
+SUMMARY_STATS = [('Rating 2.0', 'rating'), ('DPR', 'ratio'), ('KAST', 'percent'), ('Impact', 'rating'),
+                 ('ADR', 'damage'), ('KPR', 'ratio')]
+DETAILED_STATS = [('Total kills', 'count'), ('Headshot %', 'percent'), ('Total deaths', 'count'),
+                  ('K/D Ratio', 'rating'), ('Damage / Round', 'damage'), ('Grenade dmg / Round', 'small'),
+                  ('Maps played', 'count'), ('Rounds played', 'count'), ('Kills / round', 'ratio'),
+                  ('Assists / round', 'ratio'), ('Deaths / round', 'ratio'),
+                  ('Saved by teammate / round', 'ratio'), ('Saved teammates / round', 'ratio'),
+                  ('Rating 2.0', 'rating')]
+ROLE_SUBSTATS = {
+    'firepower': [('Kills per round', 'ratio'), ('Kills per round win', 'rating'), ('Damage per round', 'damage'),
+                  ('Damage per round win', 'damage'), ('Rounds with a kill', 'percent'), ('Rating 2.0', 'rating'),
+                  ('Rounds with a multi-kill', 'percent'), ('Pistol round rating', 'rating')],
+    'entrying': [('Saved by teammate per round', 'ratio'), ('Traded deaths per round', 'ratio'),
+                 ('Traded deaths percentage', 'percent'), ('Opening deaths traded percentage', 'percent'),
+                 ('Assists per round', 'ratio'), ('Support rounds', 'percent')],
+    'trading': [('Saved teammate per round', 'ratio'), ('Trade kills per round', 'ratio'),
+                ('Trade kills percentage', 'percent'), ('Assisted kills percentage', 'percent'),
+                ('Damage per kill', 'count')],
+    'opening': [('Opening kills per round', 'ratio'), ('Opening deaths per round', 'ratio'),
+                ('Opening attempts', 'percent'), ('Opening success', 'percent'),
+                ('Win% after opening kill', 'percent'), ('Attacks per round', 'small')],
+    'clutching': [('Clutch points per round', 'ratio'), ('Last alive percentage', 'percent'),
+                  ('1on1 win percentage', 'percent'), ('Time alive per round', 'time'),
+                  ('Saves per round loss', 'percent')],
+    'sniping': [('Sniper kills per round', 'ratio'), ('Sniper kills percentage', 'percent'),
+                ('Rounds with sniper kills percentage', 'percent'), ('Sniper multi-kill rounds', 'ratio'),
+                ('Sniper opening kills per round', 'ratio')],
+    'utility': [('Utility damage per round', 'small'), ('Utility kills per 100 rounds', 'ratio'),
+                ('Flashes thrown per round', 'ratio'), ('Flash assists per round', 'ratio'),
+                ('Time opponent flashed per round', 'small')],
+}
+
+def random_value(rng: random.Random, kind: str) -> str:
+    if kind == 'rating':
+        return f"{rng.uniform(0.7, 1.4):.2f}"
+    if kind == 'ratio':
+        return f"{rng.uniform(0.0, 1.0):.2f}"
+    if kind == 'percent':
+        return f"{rng.uniform(0.0, 100.0):.1f}%"
+    if kind == 'damage':
+        return f"{rng.uniform(50.0, 100.0):.1f}"
+    if kind == 'small':
+        return f"{rng.uniform(0.0, 10.0):.2f}"
+    if kind == 'count':
+        return str(rng.randint(100, 40000))
+    if kind == 'time':
+        return f"{rng.randint(0, 2)}m {rng.randint(0, 59)}s"
+    raise ValueError(f"Unknown stat kind: {kind}")
+
+def synthetic_team(player_id: int) -> Optional[str]:
+    # Roughly 40% of profiles have no team, like the real data
+    if player_id % 5 < 2:
+        return None
+    return f"Team {player_id // 5}"
+
+def synthetic_profile(player_id: int, padding_bytes: int = 0) -> str:
+    """
+    A player profile page with the markup extract_player_data expects, deterministic per player_id.
+    Like the real pages, about RATING_1_SHARE of them show Rating 1.0 in place of Rating 2.0
+    in the summary and detailed stats (the firepower role stats always use Rating 2.0).
+    """
+    rng = random.Random(player_id)
+    rating_name = 'Rating 1.0' if rng.random() < RATING_1_SHARE else 'Rating 2.0'
+    parts = ['<html><body>',
+             f'<h1 class="summaryNickname">player{player_id}</h1>',
+             f'<div class="summaryRealname">Synthetic Player {player_id}</div>']
+    team = synthetic_team(player_id)
+    if team:
+        parts.append(f'<div class="SummaryTeamname">{team}</div>')
+    parts.append(f'<div class="summaryPlayerAge">{rng.randint(16, 35)} years</div>')
+
+    for name, kind in SUMMARY_STATS:
+        name = rating_name if name == 'Rating 2.0' else name
+        parts.append('<div class="summaryStatBreakdown">'
+                     f'<div class="summaryStatBreakdownSubHeader">{name}\n<span>?</span></div>'
+                     f'<div class="summaryStatBreakdownDataValue">{random_value(rng, kind)}</div></div>')
+
+    parts.append('<div class="statistics">')
+    for name, kind in DETAILED_STATS:
+        name = rating_name if name == 'Rating 2.0' else name
+        parts.append(f'<div class="stats-row"><span>{name}</span><span>{random_value(rng, kind)}</span></div>')
+    parts.append('</div>')
+
+    for category in ROLE_CATEGORIES:
+        parts.append(f'<div class="role-stats-section role-{category}">'
+                     f'<div class="row-stats-section-score">{rng.randint(0, 100)}/100</div>')
+        for name, kind in ROLE_SUBSTATS[category]:
+            parts.append('<div class="role-stats-row">'
+                         f'<div class="role-stats-title">{name}</div>'
+                         f'<div class="role-stats-data">{random_value(rng, kind)}</div></div>')
+        parts.append('</div>')
+
+    if padding_bytes:
+        # Real pages are mostly unrelated markup the parser has to walk past
+        filler = '<div class="filler"><span>lorem ipsum</span></div>'
+        parts.append(filler * (padding_bytes // len(filler)))
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+def synthetic_leaderboard(offset: int, n_players: int) -> str:
+    """One page of the /stats/players table that parse_player_stats and get_next_page_url expect."""
+    rows = ['<tr><th>Player</th><th>Team</th><th>Maps</th><th>Rounds</th>'
+            '<th>K-D Diff</th><th>K/D</th><th>Rating</th></tr>']
+    for player_id in range(offset, min(offset + LEADERBOARD_PAGE_SIZE, n_players)):
+        rng = random.Random(player_id)
+        team = synthetic_team(player_id)
+        team_img = f'<img alt="{team}" src="/team.png">' if team else ''
+        rows.append(
+            '<tr>'
+            f'<td><img alt="Country{player_id % 50}" src="/flag.png">'
+            f'<a href="/stats/players/{player_id}/player{player_id}">player{player_id}</a></td>'
+            f'<td>{team_img}</td>'
+            f'<td>{rng.randint(100, 2000)}</td><td>{rng.randint(2000, 50000)}</td>'
+            f'<td>{rng.randint(-2000, 10000):+d}</td><td>{rng.uniform(0.7, 1.4):.2f}</td>'
+            f'<td>{rng.uniform(0.7, 1.4):.2f}</td>'
+            '</tr>'
+        )
+
+    next_offset = offset + LEADERBOARD_PAGE_SIZE
+    if next_offset < n_players:
+        pagination = f'<a class="pagination-next" href="/stats/players?offset={next_offset}">Next</a>'
+    else:
+        pagination = '<a class="pagination-next disabled">Next</a>'
+    return ('<html><body><table class="stats-table player-ratings-table">'
+            + ''.join(rows) + '</table>' + pagination + '</body></html>')
+
+def recording_key(path: str) -> str:
+    return hashlib.sha1(path.encode('utf-8')).hexdigest() + '.html'
+
+def record_page(recordings_dir: str, url: str, html: str) -> None:
+    """Save a fetched page so the replay server can serve it under the same path and query."""
+    os.makedirs(recordings_dir, exist_ok=True)
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    file_name = recording_key(path)
+    with open(os.path.join(recordings_dir, file_name), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    index_path = os.path.join(recordings_dir, RECORDINGS_INDEX)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    index[path] = file_name
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Local stand-in for hltv.org.
+
+    Recorded pages are served first (matching path and query, then path
+    alone). If synthetic_players is set, anything else under /stats/players
+    is generated on the fly. Every response is delayed by latency plus a
+    uniform jitter, and a fraction of requests fail with 429 or 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, recordings_dir: Optional[str] = None, synthetic_players: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: int = 1, padding_bytes: int = 0,
+                 seed: Optional[int] = None):
+        super().__init__(address, ReplayHandler)
+        self.synthetic_players = synthetic_players
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.padding_bytes = padding_bytes
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+
+        self.recordings_dir = recordings_dir
+        self.recordings: Dict[str, str] = {}
+        if recordings_dir and os.path.exists(os.path.join(recordings_dir, RECORDINGS_INDEX)):
+            with open(os.path.join(recordings_dir, RECORDINGS_INDEX), 'r', encoding='utf-8') as f:
+                self.recordings = json.load(f)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def page_for(self, path: str) -> Optional[str]:
+        parts = urlsplit(path)
+        for key in (path, parts.path):
+            if key in self.recordings:
+                with open(os.path.join(self.recordings_dir, self.recordings[key]), 'r', encoding='utf-8') as f:
+                    return f.read()
+
+        if parts.path == '/':
+            return '<html><body>replay</body></html>'
+        if not self.synthetic_players:
+            return None
+
+        segments = [s for s in parts.path.split('/') if s]
+        if segments == ['stats', 'players']:
+            offset = int(parse_qs(parts.query).get('offset', ['0'])[0])
+            return synthetic_leaderboard(offset, self.synthetic_players)
+        if len(segments) == 4 and segments[:2] == ['stats', 'players'] and segments[2].isdigit():
+            player_id = int(segments[2])
+            if player_id < self.synthetic_players:
+                return synthetic_profile(player_id, self.padding_bytes)
+        return None
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+
+        delay = server.latency + (server.jitter * server.roll() if server.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        roll = server.roll()
+        if roll < server.rate_limit_rate:
+            server.count('status_429')
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if roll < server.rate_limit_rate + server.error_rate:
+            server.count('status_503')
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        page = server.page_for(self.path)
+        if page is None:
+            server.count('status_404')
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = page.encode('utf-8')
+        server.count('status_200')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # The default handler logs every request to stderr, which dominates a load test
+        pass
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **kwargs) -> ReplayServer:
+    """Start a ReplayServer on a background thread. Port 0 picks a free port."""
+    server = ReplayServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_load_test(server: ReplayServer, n_profiles: int, workers: int = 1,
+                  leaderboard_pages: int = 0, retries: int = 3, backoff_factor: float = 0.3) -> Dict[str, Any]:
+    """
+    Fetch and parse leaderboard pages and profiles from server with the real scraper code.
+
+    Fetching goes through scrape.fetch_page so its retry/backoff behaviour is
+    exercised; profiles are parsed with extract_player_data + flatten_player_data.
+    """
+    # Imported here so serving pages does not need the scrapers' dependencies
+    import scrape
+    from deepplayerdata import extract_player_data, flatten_player_data
+
+    base_url = server.base_url
+    fetch_times: List[float] = []
+    parse_times: List[float] = []
+    failures = 0
+    parsed_players = 0
+    times_lock = threading.Lock()
+
+    def fetch_and_parse(url: str, parse):
+        start = time.perf_counter()
+        html = scrape.fetch_page(url, retries=retries, backoff_factor=backoff_factor)
+        fetched = time.perf_counter()
+        if html is None:
+            return None
+        result = parse(html)
+        with times_lock:
+            fetch_times.append(fetched - start)
+            parse_times.append(time.perf_counter() - fetched)
+        return result
+
+    start_requests = server.counters.get('requests', 0)
+    start = time.perf_counter()
+
+    leaderboard_url = f"{base_url}/stats/players"
+    leaderboard_fetched = 0  # pagination can end, or a fetch fail, before leaderboard_pages
+    for _ in range(leaderboard_pages):
+        leaderboard_fetched += 1
+        html = fetch_and_parse(leaderboard_url, lambda page: page)
+        if html is None:
+            failures += 1
+            break
+        parsed_players += len(scrape.parse_player_stats(html, base_url))
+        leaderboard_url = scrape.get_next_page_url(html, base_url)
+        if leaderboard_url is None:
+            break
+
+    profile_urls = [f"{base_url}/stats/players/{i}/player{i}?startDate=all" for i in range(n_profiles)]
+    parse_profile = lambda html: flatten_player_data(extract_player_data(html))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(lambda url: fetch_and_parse(url, parse_profile), profile_urls):
+            if result is None:
+                failures += 1
+            else:
+                parsed_players += 1
+
+    elapsed = time.perf_counter() - start
+    pages = leaderboard_fetched + n_profiles
+    requests_made = server.counters.get('requests', 0) - start_requests
+    return {
+        'pages': pages,
+        'failures': failures,
+        'players_parsed': parsed_players,
+        'requests': requests_made,
+        'retries': requests_made - pages,
+        'elapsed_s': elapsed,
+        'pages_per_s': pages / elapsed if elapsed else 0.0,
+        'fetch_ms_mean': statistics.mean(fetch_times) * 1000 if fetch_times else 0.0,
+        'fetch_ms_p95': percentile(fetch_times, 95) * 1000,
+        'parse_ms_mean': statistics.mean(parse_times) * 1000 if parse_times else 0.0,
+        'parse_ms_p95': percentile(parse_times, 95) * 1000,
+        'server_counters': dict(server.counters),
+    }
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--recordings', default=RECORDINGS_DIR, help="Directory of recorded pages")
+    parser.add_argument('--players', type=int, default=100000, help="Number of synthetic players (0 to disable)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Base response delay in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra uniform random delay in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--padding-kb', type=int, default=0, help="Filler markup added to each synthetic profile")
+    parser.add_argument('--seed', type=int, help="Seed for latency and error injection")
+
+def server_options(args) -> Dict[str, Any]:
+    return dict(recordings_dir=args.recordings, synthetic_players=args.players, latency=args.latency,
+                jitter=args.jitter, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                retry_after=args.retry_after, padding_bytes=args.padding_kb * 1024, seed=args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay server and load generator for the HLTV scrapers.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Serve recorded and synthetic pages until interrupted")
+    add_server_arguments(serve_parser)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8800)
+
+    bench_parser = subparsers.add_parser('bench', help="Start a server in-process and measure fetch/parse throughput")
+    add_server_arguments(bench_parser)
+    bench_parser.add_argument('--profiles', type=int, default=1000, help="Number of profile pages to fetch")
+    bench_parser.add_argument('--leaderboard-pages', type=int, default=10)
+    bench_parser.add_argument('--workers', type=int, default=1)
+    bench_parser.add_argument('--retries', type=int, default=3)
+    bench_parser.add_argument('--backoff-factor', type=float, default=0.3)
+    bench_parser.add_argument('--output', help="Also write the results to this JSON file")
+
+    record_parser = subparsers.add_parser('record', help="Fetch live pages and save them for replay")
+    record_parser.add_argument('urls', nargs='+')
+    record_parser.add_argument('--recordings', default=RECORDINGS_DIR)
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = ReplayServer((args.host, args.port), **server_options(args))
+        print(f"Serving {len(server.recordings)} recorded pages and {args.players} synthetic players on {server.base_url}")
+        print(f"Point the scrapers at it with HLTV_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            server.server_close()
+
+    elif args.command == 'bench':
+        server = start_server(**server_options(args))
+        try:
+            results = run_load_test(server, args.profiles, workers=args.workers,
+                                    leaderboard_pages=args.leaderboard_pages,
+                                    retries=args.retries, backoff_factor=args.backoff_factor)
+        finally:
+            server.shutdown()
+            server.server_close()
+        print(json.dumps(results, indent=2))
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    elif args.command == 'record':
+        import requests
+        from user_agents import random_user_agent
+
+        # A plain GET of the exact URL: deepplayerdata.fetch_page would append ?startDate=all and sleep
+        for url in args.urls:
+            response = requests.get(url, headers={'User-Agent': random_user_agent()}, timeout=RECORD_TIMEOUT)
+            response.raise_for_status()
+            record_page(args.recordings, url, response.text)
+            print(f"Recorded {url}")
+
+if __name__ == '__main__':
+    main()
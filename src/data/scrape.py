@@ -1,34 +1,48 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import time
 import random
 import csv
 from urllib.parse import urljoin
 import logging
-from fake_useragent import UserAgent
+import os
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from instrumentation import METRICS, start_metrics_server
+from user_agents import random_user_agent
 
-# Initialize UserAgent
-ua = UserAgent()
+# requests and BeautifulSoup are imported inside the functions that use them, so
+# --help and other quick invocations do not pay for loading them.
+
+HLTV_BASE_URL = os.environ.get('HLTV_BASE_URL', 'https://www.hltv.org')  # override to point at a local replay server
+OUTPUT_CSV_FILE_PATH = 'hltv_player_stats.csv'
+METRICS_REPORT_PATH = 'hltv_player_stats_metrics.json'
 
 def fetch_page(url, retries=3, backoff_factor=0.3):
-    headers = {'User-Agent': ua.random}
+    import requests
+
+    headers = {'User-Agent': random_user_agent()}
     
     for i in range(retries):
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            with METRICS.timer('fetch', url=url):
+                response = requests.get(url, headers=headers, timeout=10)
+                METRICS.record_response(response.status_code, len(response.content))
+                response.raise_for_status()
             return response.text
         except requests.RequestException as e:
+            if e.response is None:
+                METRICS.inc('http_errors_total', error=type(e).__name__)
             if i == retries - 1:
                 logging.error(f"Error fetching {url}: {e}")
+                METRICS.inc('fetch_failures_total')
                 return None
             else:
-                time.sleep((backoff_factor * (2 ** i)) + random.uniform(0, 0.1))
+                METRICS.inc('retries_total')
+                with METRICS.timer('backoff', url=url):
+                    time.sleep((backoff_factor * (2 ** i)) + random.uniform(0, 0.1))
 
 def parse_player_stats(html, base_url):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, 'html.parser')
     players = []
     
@@ -58,27 +72,33 @@ def parse_player_stats(html, base_url):
     return players
 
 def get_next_page_url(html, base_url):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, 'html.parser')
     next_button = soup.find('a', class_='pagination-next')
     if next_button and 'disabled' not in next_button.get('class', []):
         return urljoin(base_url, next_button['href'])
     return None
 
-def scrape_player_stats(base_url):
+def scrape_player_stats(base_url, max_pages=None):
     all_players = []
     current_url = base_url
     page_number = 1
     
-    while current_url:
+    while current_url and (max_pages is None or page_number <= max_pages):
         logging.info(f"Scraping page {page_number}: {current_url}")
         html = fetch_page(current_url)
         if html:
-            players = parse_player_stats(html, base_url)
+            with METRICS.timer('parse', url=current_url):
+                players = parse_player_stats(html, base_url)
+                next_url = get_next_page_url(html, base_url)
             all_players.extend(players)
+            METRICS.inc('players_parsed_total', len(players))
             
-            current_url = get_next_page_url(html, base_url)
+            current_url = next_url
             if current_url:
-                time.sleep(random.uniform(3, 7))  # Random delay between page requests
+                with METRICS.timer('delay'):
+                    time.sleep(random.uniform(3, 7))  # Random delay between page requests
                 page_number += 1
         else:
             logging.error(f"Failed to fetch page {page_number}. Stopping.")
@@ -93,7 +113,7 @@ def write_to_csv(data, filename):
 
     fieldnames = ['country', 'name', 'player_url', 'team', 'maps', 'rounds', 'kd_diff', 'kd', 'rating']
 
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+    with METRICS.timer('write'), open(filename, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
         for player in data:
@@ -102,14 +122,27 @@ def write_to_csv(data, filename):
     logging.info(f"Data written to {filename}")
 
 def main():
-    base_url = 'https://www.hltv.org/stats/players'
-    players = scrape_player_stats(base_url)
+    parser = argparse.ArgumentParser(description="Scrape the HLTV player stats leaderboard into a CSV.")
+    parser.add_argument('--base-url', default=f'{HLTV_BASE_URL}/stats/players', help="First leaderboard page")
+    parser.add_argument('--max-pages', type=int, help="Stop after this many leaderboard pages")
+    parser.add_argument('--output', default=OUTPUT_CSV_FILE_PATH)
+    parser.add_argument('--metrics-report', default=METRICS_REPORT_PATH, help="Where to write the run's metrics JSON")
+    args = parser.parse_args()
+
+    # Set up logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start_metrics_server()
+    players = scrape_player_stats(args.base_url, args.max_pages)
     
     if players:
-        write_to_csv(players, 'hltv_player_stats.csv')
+        write_to_csv(players, args.output)
         logging.info(f"Successfully scraped data for {len(players)} players.")
     else:
         logging.error("No player data collected. Check if the scraping was successful.")
+    
+    METRICS.write_report(args.metrics_report)
+    logging.info(f"Run report written to {args.metrics_report}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
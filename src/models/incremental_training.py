@@ -0,0 +1,229 @@
+import argparse
+import copy
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from xgboost import XGBRegressor
+
+# Configuration
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+OUTPUTS_DIR = os.path.join(ROOT_DIR, 'outputs')
+X_TRAIN_PATH = os.path.join(OUTPUTS_DIR, 'X_train_encoded.joblib')
+Y_TRAIN_PATH = os.path.join(OUTPUTS_DIR, 'y_train.joblib')
+X_TEST_PATH = os.path.join(OUTPUTS_DIR, 'X_test_encoded.joblib')
+Y_TEST_PATH = os.path.join(OUTPUTS_DIR, 'y_test.joblib')
+STATE_PATH = os.path.join(MODELS_DIR, 'incremental_state.joblib')
+
+# Model files written by ModelTime.ipynb
+MODEL_FILES = {
+    'RandomForest': 'random_forest_model.joblib',
+    'XGBoost': 'xgboost_model.joblib',
+}
+
+EXTRA_TREES = 20  # RandomForest trees added per incremental update
+EXTRA_BOOSTING_ROUNDS = 20  # XGBoost rounds added per incremental update
+INCREMENTAL_LEARNING_RATE_SCALE = 0.1  # keeps the extra rounds from overfitting a handful of rows
+MSE_TOLERANCE = 0.10  # allowed relative rise in held-out MSE over the last full fit
+DRIFT_Z_THRESHOLD = 4.0  # z-score of a changed-row feature mean above which it counts as drift
+MIN_DRIFT_ROWS = 10  # fewer changed rows than this are too noisy to judge drift on
+MAX_INCREMENTAL_UPDATES = 10  # force a full refit after this many incremental updates
+
+
+def load_state(file_path: str = STATE_PATH) -> Dict[str, Any]:
+    if os.path.exists(file_path):
+        return joblib.load(file_path)
+    return {'models': {}}
+
+
+def changed_rows(old_X: pd.DataFrame, old_y: pd.Series,
+                 new_X: pd.DataFrame, new_y: pd.Series) -> pd.Index:
+    """Index labels in the new table that are either new or whose features/target differ."""
+    added = new_X.index.difference(old_X.index)
+    common = new_X.index.intersection(old_X.index)
+
+    old_common = old_X.loc[common, new_X.columns]
+    new_common = new_X.loc[common]
+    feature_diff = ~np.isclose(old_common.to_numpy(dtype=float), new_common.to_numpy(dtype=float),
+                               equal_nan=True).all(axis=1)
+    target_diff = ~np.isclose(old_y.loc[common].to_numpy(dtype=float), new_y.loc[common].to_numpy(dtype=float),
+                              equal_nan=True)
+    modified = common[feature_diff | target_diff]
+    return added.append(modified)
+
+
+def feature_mean_shift(reference_X: pd.DataFrame, X: pd.DataFrame) -> pd.Series:
+    """Shift of each feature mean in X relative to reference_X, in units of reference standard deviation."""
+    std = reference_X.std().replace(0, 1.0)
+    return ((X.mean() - reference_X.mean()) / std).abs()
+
+
+def feature_mean_z(reference_X: pd.DataFrame, X: pd.DataFrame) -> pd.Series:
+    """
+    z-score of each feature mean in X against reference_X, i.e. the mean shift
+    divided by the standard error of a mean over len(X) rows. A fixed shift
+    threshold would flag small samples at random, since their means are noisy.
+    """
+    return feature_mean_shift(reference_X, X) * np.sqrt(len(X))
+
+
+def holdout_mse(model, X_test: pd.DataFrame, y_test: pd.Series) -> float:
+    return mean_squared_error(y_test, model.predict(X_test))
+
+
+def full_refit(model, X: pd.DataFrame, y: pd.Series):
+    """Refit from scratch with the model's current (already tuned) hyperparameters."""
+    fresh = clone(model)
+    if isinstance(fresh, RandomForestRegressor):
+        fresh.set_params(warm_start=False)
+    fresh.fit(X, y)
+    return fresh
+
+
+def incremental_fit(model, X: pd.DataFrame, y: pd.Series, X_changed: pd.DataFrame, y_changed: pd.Series,
+                    extra_trees: int = EXTRA_TREES, extra_rounds: int = EXTRA_BOOSTING_ROUNDS):
+    """
+    Grow an already fitted model instead of refitting it.
+
+    RandomForest keeps its trees and adds extra_trees new ones fitted on the
+    full updated table (warm_start). XGBoost continues boosting from the
+    existing booster for extra_rounds rounds on the new or changed rows only,
+    with a reduced learning rate.
+    """
+    if isinstance(model, RandomForestRegressor):
+        # Grow a copy, so the caller's model is untouched if the candidate is rejected
+        updated = copy.deepcopy(model)
+        params = model.get_params()
+        updated.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra_trees)
+        updated.fit(X, y)
+        # Restore the tuned hyperparameters so a later full refit starts from them, not from these
+        updated.set_params(n_estimators=params['n_estimators'], warm_start=params['warm_start'])
+        return updated
+
+    if isinstance(model, XGBRegressor):
+        updated = clone(model)
+        params = model.get_params()
+        learning_rate = params['learning_rate'] or 0.3  # XGBoost's default eta
+        updated.set_params(n_estimators=extra_rounds,
+                           learning_rate=learning_rate * INCREMENTAL_LEARNING_RATE_SCALE)
+        updated.fit(X_changed, y_changed, xgb_model=model.get_booster())
+        # Restore the tuned hyperparameters so a later full refit starts from them, not from these
+        updated.set_params(n_estimators=params['n_estimators'], learning_rate=params['learning_rate'])
+        return updated
+
+    raise TypeError(f"Incremental training is not supported for {type(model).__name__}")
+
+
+def update_model(name: str, model, X: pd.DataFrame, y: pd.Series, X_test: pd.DataFrame, y_test: pd.Series,
+                 model_state: Dict[str, Any], force_full: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Bring one model up to date with the training table (X, y) and return it with its new state.
+
+    The model is refitted from scratch when forced, when there is no previous
+    state, when rows were removed from the table (the trees cannot unlearn
+    them), when the changed rows have drifted away from the data of the last
+    full fit, or when the incrementally updated model does worse on the
+    held-out set than the last full fit by more than MSE_TOLERANCE.
+
+    model_state keeps the table the model was last updated with ('X', 'y'),
+    to find changed rows, and the features of the last full fit
+    ('reference_X'), to judge drift against.
+    """
+    start = time.perf_counter()
+    reason = None
+
+    if force_full:
+        reason = "forced"
+    elif not model_state:
+        reason = "no previous training state"
+    elif model_state['incremental_updates'] >= MAX_INCREMENTAL_UPDATES:
+        reason = f"{MAX_INCREMENTAL_UPDATES} incremental updates since last full fit"
+
+    if reason is None:
+        removed = model_state['X'].index.difference(X.index)
+        changed = changed_rows(model_state['X'], model_state['y'], X, y)
+        # States saved before reference_X was kept only have the last table
+        reference_X = model_state.get('reference_X', model_state['X'])
+        z = feature_mean_z(reference_X, X.loc[changed]) if len(changed) >= MIN_DRIFT_ROWS else None
+        if not removed.empty:
+            reason = f"{len(removed)} rows removed from the training table"
+        elif changed.empty:
+            print(f"{name}: no new or changed rows, nothing to do")
+            return model, model_state
+        elif z is not None and z.max() > DRIFT_Z_THRESHOLD:
+            shift = feature_mean_shift(reference_X, X.loc[changed])
+            reason = f"feature drift on '{z.idxmax()}' ({shift[z.idxmax()]:.2f} std, z={z.max():.1f})"
+        else:
+            candidate = incremental_fit(model, X, y, X.loc[changed], y.loc[changed])
+            mse = holdout_mse(candidate, X_test, y_test)
+            if mse > model_state['baseline_mse'] * (1 + MSE_TOLERANCE):
+                reason = f"held-out MSE rose to {mse:.4f} from {model_state['baseline_mse']:.4f}"
+            else:
+                elapsed = time.perf_counter() - start
+                print(f"{name}: incremental update on {len(changed)} rows in {elapsed:.2f}s "
+                      f"(held-out MSE {mse:.4f})")
+                new_state = dict(model_state, X=X, y=y, reference_X=reference_X, last_mse=mse,
+                                 incremental_updates=model_state['incremental_updates'] + 1)
+                return candidate, new_state
+
+    refitted = full_refit(model, X, y)
+    mse = holdout_mse(refitted, X_test, y_test)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: full refit ({reason}) in {elapsed:.2f}s (held-out MSE {mse:.4f})")
+    return refitted, {'X': X, 'y': y, 'reference_X': X, 'baseline_mse': mse, 'last_mse': mse,
+                      'incremental_updates': 0}
+
+
+def run(X: pd.DataFrame, y: pd.Series, X_test: pd.DataFrame, y_test: pd.Series,
+        models_dir: str = MODELS_DIR, state_path: str = STATE_PATH, force_full: bool = False,
+        model_names: Optional[list] = None) -> Dict[str, Any]:
+    state = load_state(state_path)
+    updated = {}
+
+    for name, file_name in MODEL_FILES.items():
+        if model_names and name not in model_names:
+            continue
+        model_path = os.path.join(models_dir, file_name)
+        if not os.path.exists(model_path):
+            print(f"{name}: {model_path} not found, run ModelTime.ipynb first. Skipping.")
+            continue
+
+        model = joblib.load(model_path)
+        model, state['models'][name] = update_model(name, model, X, y, X_test, y_test,
+                                                    state['models'].get(name, {}), force_full=force_full)
+        joblib.dump(model, model_path)
+        updated[name] = model
+
+    joblib.dump(state, state_path)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the saved models with new or changed training rows.")
+    parser.add_argument('--X', default=X_TRAIN_PATH, help="Encoded training features (joblib)")
+    parser.add_argument('--y', default=Y_TRAIN_PATH, help="Training target (joblib)")
+    parser.add_argument('--X-test', default=X_TEST_PATH, help="Encoded held-out features (joblib)")
+    parser.add_argument('--y-test', default=Y_TEST_PATH, help="Held-out target (joblib)")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_FILES), help="Only update these models")
+    parser.add_argument('--full', action='store_true', help="Skip the drift checks and refit from scratch")
+    args = parser.parse_args()
+
+    X = joblib.load(args.X)
+    y = joblib.load(args.y)
+    X_test = joblib.load(args.X_test)
+    y_test = joblib.load(args.y_test)
+
+    start = time.perf_counter()
+    run(X, y, X_test, y_test, force_full=args.full, model_names=args.models)
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()